@@ -0,0 +1,167 @@
+"""Streaming filters for raw ADC blocks, e.g. ADS1115Scan.scan_into results.
+
+Every stage works in place on an array and keeps its state between calls,
+so a block may end in the middle of a decimation group. The arithmetic is
+integer only and nothing is allocated per sample, which keeps the stages
+usable at 860 SPS on ports where floats live on the heap.
+
+All process() methods take (buf, n, offset=0, stride=1): the n samples at
+buf[offset], buf[offset + stride], ... are filtered and the results are
+written back to the same positions from the start; the new count is
+returned. With stride equal to the number of scan slots one slot of an
+interleaved scan_into block is filtered without copying it out.
+
+    chain = FilterChain(Median(3), DecimatingAverage(5), IIRLowPass(2))
+    scan.scan_into(block, passes=15)
+    m = chain.process(block, 15, offset=slot, stride=len(scan.slots))
+
+adc_host.py has NumPy equivalents for captured blocks on the host.
+"""
+from array import array
+
+
+class DecimatingAverage:
+    """Mean of every factor consecutive samples"""
+
+    def __init__(self, factor):
+        self.factor = factor
+        self.reset()
+
+    def reset(self):
+        self.acc = 0
+        self.count = 0
+
+    def process(self, buf, n, offset=0, stride=1):
+        factor = self.factor
+        half = factor >> 1
+        acc = self.acc
+        count = self.count
+        out = offset
+        index = offset
+        for _ in range(n):
+            acc += buf[index]
+            index += stride
+            count += 1
+            if count == factor:
+                buf[out] = (acc + half) // factor
+                out += stride
+                acc = 0
+                count = 0
+        self.acc = acc
+        self.count = count
+        return (out - offset) // stride
+
+
+class Median:
+    """Median of every size consecutive samples, size odd"""
+
+    def __init__(self, size=3):
+        self.size = size
+        self.window = array('i', [0] * size)
+        self.reset()
+
+    def reset(self):
+        self.count = 0
+
+    def process(self, buf, n, offset=0, stride=1):
+        size = self.size
+        window = self.window
+        count = self.count
+        out = offset
+        index = offset
+        for _ in range(n):
+            # Insertion sort into the window as samples arrive
+            value = buf[index]
+            index += stride
+            j = count
+            while j > 0 and window[j - 1] > value:
+                window[j] = window[j - 1]
+                j -= 1
+            window[j] = value
+            count += 1
+            if count == size:
+                buf[out] = window[size >> 1]
+                out += stride
+                count = 0
+        self.count = count
+        return (out - offset) // stride
+
+
+class IIRLowPass:
+    """First-order low-pass y += (x - y) / 2**shift, one output per input"""
+
+    def __init__(self, shift=3):
+        self.shift = shift
+        self.reset()
+
+    def reset(self):
+        self.state = None  # y << shift, seeded by the first sample
+
+    def process(self, buf, n, offset=0, stride=1):
+        shift = self.shift
+        state = self.state
+        index = offset
+        for _ in range(n):
+            if state is None:
+                state = buf[index] << shift
+            state += buf[index] - (state >> shift)
+            buf[index] = state >> shift
+            index += stride
+        self.state = state
+        return n
+
+
+class Kalman:
+    """Scalar Kalman filter for a slowly drifting level.
+
+    q is the process and r the measurement noise variance, both in
+    counts squared. The estimate is kept with 4 fractional bits and the
+    gain with 8, which stays within small ints for 16-bit input.
+    """
+
+    def __init__(self, q=1, r=100):
+        self.q = q
+        self.r = r
+        self.reset()
+
+    def reset(self):
+        self.estimate = None  # Q4
+        self.p = self.r
+
+    def process(self, buf, n, offset=0, stride=1):
+        q = self.q
+        r = self.r
+        estimate = self.estimate
+        p = self.p
+        index = offset
+        for _ in range(n):
+            z = buf[index] << 4
+            if estimate is None:
+                estimate = z
+            p += q
+            gain = (p << 8) // (p + r)
+            estimate += ((z - estimate) * gain) >> 8
+            p = (p * (256 - gain)) >> 8
+            buf[index] = (estimate + 8) >> 4
+            index += stride
+        self.estimate = estimate
+        self.p = p
+        return n
+
+
+class FilterChain:
+    """Stages applied one after another to the same buffer"""
+
+    def __init__(self, *stages):
+        self.stages = stages
+
+    def reset(self):
+        for stage in self.stages:
+            stage.reset()
+
+    def process(self, buf, n, offset=0, stride=1):
+        for stage in self.stages:
+            n = stage.process(buf, n, offset, stride)
+            if not n:
+                break
+        return n
@@ -0,0 +1,84 @@
+"""
+Host-side helpers for raw ADS1115/ADS1015 blocks captured on the stand
+controller (ADS1115Scan.scan_into, ADS1115Stream.read).
+
+Mirrors the conversions in ads1115.py, which only runs under MicroPython.
+"""
+import numpy as np
+
+# Full-scale range in volts for each ADS1115 gain index (2/3x .. 16x)
+GAINS_V = (6.144, 4.096, 2.048, 1.024, 0.512, 0.256)
+
+ADS1115_SHIFT = 0
+ADS1015_SHIFT = 4  # 12-bit results are the conversion register >> 4
+
+
+def volts_per_bit(gain, shift=ADS1115_SHIFT):
+    return GAINS_V[gain] / 32768 * (1 << shift)
+
+
+def raw_to_v(raw, gain, shift=ADS1115_SHIFT, out=None):
+    """
+    Convert a block of raw results to volts in one call.
+
+    :param raw: Sequence or array of signed results (e.g. array('h') bytes
+                viewed with np.frombuffer(data, dtype='<i2'))
+    :param gain: Gain index the block was captured with, or an array of
+                 per-sample gain indexes of the same length
+    :param out: Optional float32 array to write into
+    """
+    raw = np.asarray(raw)
+    if np.ndim(gain):
+        factor = np.asarray(GAINS_V, dtype=np.float32)[np.asarray(gain)] * np.float32((1 << shift) / 32768)
+    else:
+        factor = np.float32(volts_per_bit(gain, shift))
+    if out is None:
+        out = np.empty(raw.shape, dtype=np.float32)
+    np.multiply(raw, factor, out=out, casting='unsafe')
+    return out
+
+
+# Floating-point equivalents of the adc_filters stages for whole blocks.
+# Trailing samples that do not fill a decimation group are dropped.
+
+def decimating_average(x, factor):
+    x = np.asarray(x, dtype=np.float64)
+    usable = len(x) // factor * factor
+    return x[:usable].reshape(-1, factor).mean(axis=1)
+
+
+def median(x, size=3):
+    x = np.asarray(x, dtype=np.float64)
+    usable = len(x) // size * size
+    return np.median(x[:usable].reshape(-1, size), axis=1)
+
+
+def iir_lowpass(x, shift=3):
+    """y += (x - y) / 2**shift, seeded with the first sample"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.empty_like(x)
+    if not len(x):
+        return y
+    alpha = 1.0 / (1 << shift)
+    state = x[0]
+    for i, value in enumerate(x):
+        state += alpha * (value - state)
+        y[i] = state
+    return y
+
+
+def kalman(x, q=1.0, r=100.0):
+    """Scalar Kalman filter for a slowly drifting level, q and r as variances"""
+    x = np.asarray(x, dtype=np.float64)
+    y = np.empty_like(x)
+    if not len(x):
+        return y
+    estimate = x[0]
+    p = r
+    for i, z in enumerate(x):
+        p += q
+        gain = p / (p + r)
+        estimate += gain * (z - estimate)
+        p *= 1.0 - gain
+        y[i] = estimate
+    return y
@@ -22,6 +22,7 @@
 # THE SOFTWARE.
 #
 import utime as time
+from array import array
 
 _REGISTER_MASK = const(0x03)
 _REGISTER_CONVERT = const(0x00)
@@ -103,6 +104,8 @@ _GAINS_V = (
     0.256  # 16x
 )
 
+_GAINS_MV = (6144, 4096, 2048, 1024, 512, 256)  # Integer ranges for auto-ranging
+
 _CHANNELS = {
     (0, None): _MUX_SINGLE_0,
     (1, None): _MUX_SINGLE_1,
@@ -125,14 +128,54 @@ _RATES = (
     _DR_860SPS    # - /860 samples per Second
 )
 
+# Samples per second for each _RATES index
+_SPS_1115 = (8, 16, 32, 64, 128, 250, 475, 860)
+_SPS_1015 = (128, 250, 490, 920, 1600, 2400, 3300, 3300)
+
+# Single-shot config words, indexed by (rate * 8 + mux) * 6 + gain
+# with mux the _MUX_* value >> 12
+_SINGLE_BASE = (_CQUE_NONE | _CLAT_NONLAT | _CPOL_ACTVLOW | _CMODE_TRAD |
+                _MODE_SINGLE | _OS_SINGLE)
+_SINGLE_CONFIG = array('H', [_SINGLE_BASE | _RATES[r] | (m << 12) | _GAINS[g]
+                             for r in range(8) for m in range(8) for g in range(6)])
+
+
+def _mux(channel1, channel2):
+    if channel2 is None:
+        return 4 + channel1  # _MUX_SINGLE_n >> 12
+    return _CHANNELS[(channel1, channel2)] >> 12
+
+
+def _single_config(rate, mux, gain):
+    return _SINGLE_CONFIG[(rate * 8 + mux) * 6 + gain]
+
+
+def _conversion_us(sps):
+    """Single-shot conversion time with margin for the +/-10% oscillator
+       tolerance and the power-up from single-shot mode"""
+    period = 1000000 // sps + 1
+    return period + period // 10 + 50
+
 
 class ADS1115:
+    _SPS = _SPS_1115
+    _SHIFT = 0  # Right shift from the conversion register to a result
+
     def __init__(self, i2c, address=0x48, gain=1):
         self.i2c = i2c
         self.address = address
         self.gain = gain
         self.temp2 = bytearray(2)
 
+    @property
+    def gain(self):
+        return self._gain
+
+    @gain.setter
+    def gain(self, gain):
+        self._gain = gain
+        self._v_p_b = _GAINS_V[gain] / 32768
+
     def _write_register(self, register, value):
         self.temp2[0] = value >> 8
         self.temp2[1] = value & 0xff
@@ -143,23 +186,25 @@ class ADS1115:
         return (self.temp2[0] << 8) | self.temp2[1]
 
     def raw_to_v(self, raw):
-        v_p_b = _GAINS_V[self.gain] / 32768
-        return raw * v_p_b
+        return raw * self._v_p_b
+
+    def raw_to_v_into(self, src, dst):
+        """Convert a block of read() results to volts, dst may be an
+           array('f') of at least len(src)"""
+        v_p_b = self._v_p_b * (1 << self._SHIFT)
+        for i in range(len(src)):
+            dst[i] = src[i] * v_p_b
+        return dst
 
     def set_conv(self, rate=4, channel1=0, channel2=None):
         """Set mode for read_rev"""
-        self.mode = (_CQUE_NONE | _CLAT_NONLAT |
-                     _CPOL_ACTVLOW | _CMODE_TRAD | _RATES[rate] |
-                     _MODE_SINGLE | _OS_SINGLE | _GAINS[self.gain] |
-                     _CHANNELS[(channel1, channel2)])
+        self.mode = _single_config(rate, _mux(channel1, channel2), self._gain)
 
     def read(self, rate=4, channel1=0, channel2=None):
         """Read voltage between a channel and GND.
            Time depends on conversion rate."""
-        self._write_register(_REGISTER_CONFIG, (_CQUE_NONE | _CLAT_NONLAT |
-                             _CPOL_ACTVLOW | _CMODE_TRAD | _RATES[rate] |
-                             _MODE_SINGLE | _OS_SINGLE | _GAINS[self.gain] |
-                             _CHANNELS[(channel1, channel2)]))
+        self._write_register(_REGISTER_CONFIG,
+                             _single_config(rate, _mux(channel1, channel2), self._gain))
         while not self._read_register(_REGISTER_CONFIG) & _OS_NOTBUSY:
             time.sleep_ms(1)
         res = self._read_register(_REGISTER_CONVERT)
@@ -173,14 +218,17 @@ class ADS1115:
         return res if res < 32768 else res - 65536
 
     def alert_start(self, rate=4, channel1=0, channel2=None,
-                    threshold_high=0x4000, threshold_low=0, latched=False) :
-        """Start continuous measurement, set ALERT pin on threshold."""
-        self._write_register(_REGISTER_LOWTHRESH, threshold_low)
-        self._write_register(_REGISTER_HITHRESH, threshold_high)
+                    threshold_high=0x4000, threshold_low=0, latched=False,
+                    window=False):
+        """Start continuous measurement, set ALERT pin on threshold.
+           window=True asserts ALERT outside [threshold_low, threshold_high]."""
+        self._write_register(_REGISTER_LOWTHRESH, threshold_low & 0xffff)
+        self._write_register(_REGISTER_HITHRESH, threshold_high & 0xffff)
         self._write_register(_REGISTER_CONFIG, _CQUE_1CONV |
-                             _CLAT_LATCH if latched else _CLAT_NONLAT |
-                             _CPOL_ACTVLOW | _CMODE_TRAD | _RATES[rate] |
-                             _MODE_CONTIN | _GAINS[self.gain] |
+                             (_CLAT_LATCH if latched else _CLAT_NONLAT) |
+                             _CPOL_ACTVLOW |
+                             (_CMODE_WINDOW if window else _CMODE_TRAD) |
+                             _RATES[rate] | _MODE_CONTIN | _GAINS[self.gain] |
                              _CHANNELS[(channel1, channel2)])
 
     def conversion_start(self, rate=4, channel1=0, channel2=None):
@@ -208,8 +256,10 @@ class ADS1113(ADS1115):
     def read(self, rate=4):
         return super().read(rate, 0, 1)
 
-    def alert_start(self, rate=4, threshold_high=0x4000, threshold_low=0, latched=False):
-        return super().alert_start(rate, 0, 1, threshold_high, threshold_low, latched)
+    def alert_start(self, rate=4, threshold_high=0x4000, threshold_low=0, latched=False,
+                    window=False):
+        return super().alert_start(rate, 0, 1, threshold_high, threshold_low, latched,
+                                   window)
 
     def alert_read(self):
         return super().alert_read()
@@ -225,15 +275,19 @@ class ADS1114(ADS1115):
     def read(self, rate=4):
         return super().read(rate, 0, 1)
 
-    def alert_start(self, rate=4, threshold_high=0x4000, threshold_low=0, latched=False):
+    def alert_start(self, rate=4, threshold_high=0x4000, threshold_low=0, latched=False,
+                    window=False):
         return super().alert_start(rate, 0, 1, threshold_high,
-            threshold_low, latched)
+            threshold_low, latched, window)
 
     def alert_read(self):
         return super().alert_read()
 
 
 class ADS1015(ADS1115):
+    _SPS = _SPS_1015
+    _SHIFT = 4
+
     def __init__(self, i2c, address=0x48, gain=1):
         super().__init__(i2c, address, gain)
 
@@ -244,10 +298,443 @@ class ADS1015(ADS1115):
         return super().read(rate, channel1, channel2) >> 4
 
     def alert_start(self, rate=4, channel1=0, channel2=None, threshold_high=0x400,
-        threshold_low=0, latched=False):
+        threshold_low=0, latched=False, window=False):
         return super().alert_start(rate, channel1, channel2, threshold_high << 4,
-            threshold_low << 4, latched)
+            threshold_low << 4, latched, window)
 
     def alert_read(self):
         return super().alert_read() >> 4
 
+
+class ADS1115Scan:
+    """Pipelined single-shot scan over a list of (channel, rate, gain) slots.
+
+    The conversion register keeps the previous result until the running
+    conversion finishes, so the next slot is started first and the finished
+    one is read while the chip converts. Instead of polling the OS bit the
+    scan sleeps the conversion time of each slot's data rate.
+    Works with ADS1115 and ADS1015 (the latter's results come back >> 4).
+
+    A slot with gain None is auto-ranged between auto_min and auto_max: the
+    gain index used for its next conversion moves up once a result would
+    fit in 3/4 of a finer range and down once it passes 15/16 of the
+    current one, so a steady signal keeps its gain and costs nothing extra.
+    A clipped result drops the slot to auto_min at once; the clipped sample
+    itself is still returned. Every result is tagged with the gain index it
+    was converted with (self.gains for scan(), the tags buffer of
+    scan_into()), which voltage() and voltages_into() use.
+    """
+
+    def __init__(self, adc, slots, auto_min=0, auto_max=5):
+        """slots: (channel, rate, gain) tuples; channel is 0..3 for
+           single-ended inputs or a (channel1, channel2) pair, gain None
+           selects auto-ranging."""
+        self.adc = adc
+        self.slots = tuple(slots)
+        self.auto_min = auto_min
+        self.auto_max = auto_max
+        n = len(self.slots)
+        self.configs = array('H', [0] * n)
+        self.bases = array('H', [0] * n)  # _SINGLE_CONFIG index without the gain
+        self.conv_us = array('L', [0] * n)
+        self.slot_gains = array('b', [0] * n)  # Gain of each slot's next conversion
+        self.auto = bytearray(n)
+        for i, (channel, rate, gain) in enumerate(self.slots):
+            mux = _mux(*channel) if isinstance(channel, tuple) else _mux(channel, None)
+            self.bases[i] = (rate * 8 + mux) * 6
+            if gain is None:
+                self.auto[i] = 1
+                gain = auto_max
+            self.slot_gains[i] = gain
+            self.configs[i] = _SINGLE_CONFIG[self.bases[i] + gain]
+            self.conv_us[i] = _conversion_us(adc._SPS[rate])
+        self._full = 32767 >> adc._SHIFT
+        self._v_p_b = [v / 32768 * (1 << adc._SHIFT) for v in _GAINS_V]
+        self.values = array('h', [0] * n)
+        self.gains = array('b', [0] * n)
+
+    def _range(self, index, raw, gain):
+        """Pick the gain for the slot's next conversion from a result"""
+        level = raw if raw >= 0 else -raw
+        full = self._full
+        if level >= full:
+            new = self.auto_min
+        else:
+            scaled = level * _GAINS_MV[gain]
+            new = self.auto_min
+            for k in range(self.auto_max, self.auto_min - 1, -1):
+                if scaled * 4 < 3 * full * _GAINS_MV[k]:
+                    new = k
+                    break
+            if new <= gain and level <= full - (full >> 4):
+                return  # Inside the hysteresis band
+        if new != gain:
+            self.slot_gains[index] = new
+            self.configs[index] = _SINGLE_CONFIG[self.bases[index] + new]
+
+    def scan_into(self, buf, passes=1, offset=0, tags=None):
+        """Run the slot list passes times back to back and store the raw
+           results interleaved in buf, starting at offset. tags, if given,
+           gets the gain index of each result at the same positions."""
+        write = self.adc._write_register
+        read = self.adc.alert_read
+        ticks_us = time.ticks_us
+        ticks_diff = time.ticks_diff
+        sleep_us = time.sleep_us
+        configs = self.configs
+        conv_us = self.conv_us
+        slot_gains = self.slot_gains
+        auto = self.auto
+        n = len(configs)
+        last = offset + n * passes - 1
+        slot = 0
+        gain = slot_gains[0]
+        write(_REGISTER_CONFIG, configs[0])
+        start = ticks_us()
+        for i in range(offset, last + 1):
+            remaining = conv_us[slot] - ticks_diff(ticks_us(), start)
+            if remaining > 0:
+                sleep_us(remaining)
+            nxt = slot + 1
+            if nxt == n:
+                nxt = 0
+            next_gain = slot_gains[nxt]
+            if i < last:
+                # Start the next slot, the register still holds this one
+                write(_REGISTER_CONFIG, configs[nxt])
+                start = ticks_us()
+            raw = read()
+            buf[i] = raw
+            if tags is not None:
+                tags[i] = gain
+            if auto[slot]:
+                self._range(slot, raw, gain)
+            slot = nxt
+            gain = next_gain
+        return buf
+
+    def scan(self):
+        """One pass over all slots into self.values and self.gains"""
+        return self.scan_into(self.values, tags=self.gains)
+
+    def voltage(self, index, raw=None, gain=None):
+        """Convert the last (or the given) raw value of a slot to volts"""
+        if raw is None:
+            raw = self.values[index]
+            gain = self.gains[index]
+        elif gain is None:
+            gain = self.slot_gains[index]
+        return raw * self._v_p_b[gain]
+
+    def voltages_into(self, src, tags, dst):
+        """Convert a scan_into block and its gain tags to volts"""
+        v_p_b = self._v_p_b
+        for i in range(len(src)):
+            dst[i] = src[i] * v_p_b[tags[i]]
+        return dst
+
+
+class ADS1115Stream:
+    """Continuous conversion driven by the ALERT/RDY data-ready pulse.
+
+    Each falling edge on the pin runs an allocation-free handler that reads
+    the conversion register and stores the result and its ticks_us() time
+    in preallocated ring buffers. A uasyncio task collects the samples with
+    read(); it is woken through a ThreadSafeFlag, so nothing polls the bus.
+    When the consumer falls behind the newest samples are dropped and
+    counted in overruns.
+
+        stream = ADS1115Stream(adc, Pin(15, Pin.IN, Pin.PULL_UP), rate=7)
+        stream.start()
+        n = await stream.read(samples, times)
+    """
+
+    def __init__(self, adc, pin, size=1024, rate=7, channel1=0, channel2=None):
+        import uasyncio
+        self.adc = adc
+        self.pin = pin
+        self.rate = rate
+        self.channel1 = channel1
+        self.channel2 = channel2
+        self.size = size
+        self.samples = array('h', [0] * size)
+        self.times = array('L', [0] * size)
+        self.head = 0  # Next slot the handler writes
+        self.tail = 0  # Next slot read() takes
+        self.overruns = 0
+        self.flag = uasyncio.ThreadSafeFlag()
+        self._rx = bytearray(2)
+        self._shift = adc._SHIFT
+        self._handler = self._on_ready  # Bound once, the IRQ must not allocate
+
+    def _on_ready(self, pin):
+        t = time.ticks_us()
+        rx = self._rx
+        self.adc.i2c.readfrom_mem_into(self.adc.address, _REGISTER_CONVERT, rx)
+        head = self.head
+        nxt = head + 1
+        if nxt == self.size:
+            nxt = 0
+        if nxt == self.tail:
+            self.overruns += 1
+            return
+        raw = (rx[0] << 8) | rx[1]
+        if raw >= 32768:
+            raw -= 65536
+        self.samples[head] = raw >> self._shift
+        self.times[head] = t
+        self.head = nxt
+        self.flag.set()
+
+    def start(self):
+        """Start continuous conversion and attach the data-ready IRQ"""
+        self.head = self.tail = 0
+        self.pin.irq(trigger=self.pin.IRQ_FALLING, handler=self._handler)
+        self.adc.conversion_start(self.rate, self.channel1, self.channel2)
+
+    def stop(self):
+        """Detach the IRQ and return the chip to power-down single-shot mode"""
+        self.pin.irq(handler=None)
+        self.adc._write_register(_REGISTER_CONFIG, _CQUE_NONE | _MODE_SINGLE)
+
+    def available(self):
+        return (self.head - self.tail) % self.size
+
+    async def read(self, samples, times=None):
+        """Wait for data, then move up to len(samples) results (and their
+           ticks_us() times) out of the ring. Returns the count."""
+        while self.head == self.tail:
+            await self.flag.wait()
+        n = 0
+        limit = len(samples)
+        tail = self.tail
+        size = self.size
+        while tail != self.head and n < limit:
+            samples[n] = self.samples[tail]
+            if times is not None:
+                times[n] = self.times[tail]
+            n += 1
+            tail += 1
+            if tail == size:
+                tail = 0
+        self.tail = tail
+        return n
+
+
+class ADS1115Array:
+    """Several ADS1115/ADS1015 chips on one I2C bus, addresses 0x48..0x4B.
+
+    Each round reads a chip's previous result and starts its next
+    single-shot conversion, chip after chip, so the other chips keep
+    converting meanwhile. One wait for the slowest chip per round gives
+    N chips about N times the samples of reading them one after another.
+    """
+
+    ADDRESSES = (0x48, 0x49, 0x4A, 0x4B)
+
+    def __init__(self, i2c, addresses=None, gain=1, chip=ADS1115):
+        """addresses: chip addresses, None takes every ADS1115 address
+           that answers on the bus. chip: ADS1115 or ADS1015."""
+        if addresses is None:
+            present = i2c.scan()
+            addresses = [address for address in self.ADDRESSES if address in present]
+        self.chips = [chip(i2c, address, gain) for address in addresses]
+        if not self.chips:
+            raise OSError("No ADS1115 found at addresses 0x48..0x4B")
+        self._writes = [adc._write_register for adc in self.chips]
+        self._reads = [adc.alert_read for adc in self.chips]
+        self._wait_us = array('L', [_conversion_us(min(adc._SPS[rate] for adc in self.chips))
+                                    for rate in range(8)])
+        self._per_chip = 1  # Channels per chip of the last read_channels call
+
+    def read_channels(self, channels=(0, 1, 2, 3), rate=4, out=None):
+        """Convert the given channels on every chip. channels holds 0..3
+           or (channel1, channel2) pairs. Results land in out, an
+           array('h') of len(chips) * len(channels), chip by chip."""
+        chips = self.chips
+        writes = self._writes
+        reads = self._reads
+        wait_us = self._wait_us[rate]
+        n = len(chips)
+        per = len(channels)
+        if out is None:
+            out = array('h', [0] * (n * per))
+        ticks_us = time.ticks_us
+        ticks_diff = time.ticks_diff
+        self._per_chip = per
+        start = 0
+        for k in range(per + 1):
+            if k:
+                remaining = wait_us - ticks_diff(ticks_us(), start)
+                if remaining > 0:
+                    time.sleep_us(remaining)
+            if k < per:
+                channel = channels[k]
+                mux = _mux(*channel) if isinstance(channel, tuple) else _mux(channel, None)
+                base = rate * 48 + mux * 6
+            for i in range(n):
+                # Fetch this chip's result before its next conversion replaces it
+                if k:
+                    out[i * per + k - 1] = reads[i]()
+                if k < per:
+                    writes[i](_REGISTER_CONFIG, _SINGLE_CONFIG[base + chips[i]._gain])
+            # Timed from the last chip's start, the earlier ones are done by then
+            start = ticks_us()
+        return out
+
+    def read_all(self, rate=4, channel1=0, channel2=None, out=None):
+        """One channel on every chip, one result per chip"""
+        channel = channel1 if channel2 is None else (channel1, channel2)
+        return self.read_channels((channel,), rate, out)
+
+    def raw_to_v(self, index, raw):
+        """Volts of result index from the last read_channels or read_all"""
+        return self.chips[index // self._per_chip].raw_to_v(raw)
+
+
+class ADS1115Window:
+    """Report-by-exception monitoring with the window comparator.
+
+    The chip converts the watched channel continuously and pulls ALERT/RDY
+    low (latched) only when a result leaves [low, high]; the IRQ handler
+    just timestamps the edge and wakes run(). Nothing is read over I2C
+    while the signal stays in its band.
+
+    The comparator sees one input at a time, so with several windows run()
+    rotates the watched channel every dwell_ms. A channel that left its
+    band is re-checked on each turn until it is back inside, which is
+    reported as an INSIDE event. Events are (index, raw, ticks_ms, kind)
+    tuples; raw is in read() units, convert with adc.raw_to_v.
+
+        watch = ADS1115Window(adc, Pin(15, Pin.IN, Pin.PULL_UP))
+        watch.set_window(0, 0.5, 4.0)
+        asyncio.create_task(watch.run())
+        index, raw, t, kind = await watch.next_event()
+    """
+
+    BELOW = -1
+    INSIDE = 0
+    ABOVE = 1
+
+    def __init__(self, adc, pin, rate=7, dwell_ms=100, max_events=32):
+        import uasyncio
+        self._asyncio = uasyncio
+        self.adc = adc
+        self.pin = pin
+        self.rate = rate
+        self.dwell_ms = dwell_ms
+        self.max_events = max_events
+        self.windows = []  # [channel, low, high, outside] in read() units
+        self.events = []
+        self.dropped = 0
+        self.alerts = 0
+        self.alert_ticks = 0
+        self.running = False
+        self.flag = uasyncio.ThreadSafeFlag()
+        self.event = uasyncio.Event()
+        self._armed = None
+        self._handler = self._on_alert
+
+    def set_window(self, channel, low, high):
+        """Watch channel (0..3 or a (channel1, channel2) pair) for values
+           outside low..high volts. Returns the window index."""
+        v_p_b = self.adc._v_p_b * (1 << self.adc._SHIFT)
+        window = [channel, int(low / v_p_b), int(high / v_p_b), False]
+        for index, existing in enumerate(self.windows):
+            if existing[0] == channel:
+                self.windows[index] = window
+                return index
+        self.windows.append(window)
+        return len(self.windows) - 1
+
+    def _on_alert(self, pin):
+        self.alert_ticks = time.ticks_ms()
+        self.alerts += 1
+        self.flag.set()
+
+    def _arm(self, window):
+        channel, low, high = window[0], window[1], window[2]
+        channel1, channel2 = channel if isinstance(channel, tuple) else (channel, None)
+        self.adc.alert_start(self.rate, channel1, channel2, high, low, latched=True, window=True)
+
+    def _emit(self, index, raw, ticks, kind):
+        if len(self.events) >= self.max_events:
+            self.events.pop(0)
+            self.dropped += 1
+        self.events.append((index, raw, ticks, kind))
+        self.event.set()
+
+    async def _watch(self, index, window):
+        """Watch one window for dwell_ms, returns early on an excursion"""
+        asyncio = self._asyncio
+        adc = self.adc
+        settle_ms = _conversion_us(adc._SPS[self.rate]) // 1000 + 1
+        fresh = self._armed is not window
+        if fresh:
+            self._arm(window)  # A single window stays armed across turns
+            self._armed = window
+        # Until the first conversion of this channel ends the register and
+        # ALERT still reflect the previous one
+        if fresh or window[3]:
+            await asyncio.sleep_ms(settle_ms)
+        if window[3]:
+            # Outside last time: check if it came back
+            raw = adc.alert_read()
+            if window[1] <= raw <= window[2]:
+                window[3] = False
+                self._emit(index, raw, time.ticks_ms(), self.INSIDE)
+            return
+        seen = self.alerts  # Edges up to now belong to earlier conversions
+        if fresh:
+            # An excursion on the first conversion raised ALERT during the
+            # settle time, check the value directly (this releases the latch)
+            raw = adc.alert_read()
+            if raw > window[2] or raw < window[1]:
+                window[3] = True
+                self._emit(index, raw, time.ticks_ms(),
+                           self.ABOVE if raw > window[2] else self.BELOW)
+                return
+        deadline = time.ticks_add(time.ticks_ms(), self.dwell_ms)
+        while True:
+            remaining = time.ticks_diff(deadline, time.ticks_ms())
+            if remaining <= 0:
+                return
+            try:
+                await asyncio.wait_for(self.flag.wait(), remaining / 1000)
+            except asyncio.TimeoutError:
+                return
+            if self.alerts == seen:
+                continue  # Flag left set by an edge from before this channel settled
+            seen = self.alerts
+            raw = adc.alert_read()  # Also releases the latched ALERT pin
+            if raw > window[2] or raw < window[1]:
+                window[3] = True
+                self._emit(index, raw, self.alert_ticks,
+                           self.ABOVE if raw > window[2] else self.BELOW)
+                return
+
+    async def run(self):
+        """Rotate over the windows until stop() is called"""
+        self.running = True
+        self.pin.irq(trigger=self.pin.IRQ_FALLING, handler=self._handler)
+        try:
+            while self.running and self.windows:
+                for index in range(len(self.windows)):
+                    if not self.running:
+                        break
+                    await self._watch(index, self.windows[index])
+        finally:
+            self.pin.irq(handler=None)
+            self.adc._write_register(_REGISTER_CONFIG, _CQUE_NONE | _MODE_SINGLE)
+            self._armed = None
+            self.running = False
+
+    def stop(self):
+        self.running = False
+
+    async def next_event(self):
+        """Wait for the next (index, raw, ticks_ms, kind) event"""
+        while not self.events:
+            self.event.clear()
+            await self.event.wait()
+        return self.events.pop(0)
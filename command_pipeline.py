@@ -0,0 +1,124 @@
+import itertools
+import json
+import threading
+import time
+from collections import deque
+from queue import Queue, Empty
+
+
+class PendingCommand:
+    __slots__ = ('cid', 'payload', 'on_done', 'submitted', 'sent', 'latency')
+
+    def __init__(self, cid, payload, on_done):
+        self.cid = cid
+        self.payload = payload
+        self.on_done = on_done
+        self.submitted = time.monotonic()
+        self.sent = None
+        self.latency = None
+
+
+class CommandPipeline:
+    """
+    Outbound controller commands with acknowledgement tracking.
+
+    Commands are written by a dedicated thread, so a stalled port never
+    blocks the Tk loop. Each command carries a correlation id ("cid") that
+    the controller echoes in its reply. Replies without a cid are matched
+    to the oldest pending command with the same "command" number.
+
+    Completion callbacks are queued and run by process_completed(), which
+    the GUI calls from its own loop, so callbacks may touch Tk widgets.
+    """
+
+    def __init__(self, ser, timeout=2.0):
+        """
+        :param ser: Open serial.Serial, or None to fail every command
+        :param timeout: Seconds to wait for a reply before reporting failure
+        """
+        self.ser = ser
+        self.timeout = timeout
+        self.outbox = Queue()
+        self.completed = Queue()
+        self.pending = {}
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=1000)
+        self.timeouts = 0
+        self._cids = itertools.count(1)
+        self.thread = threading.Thread(target=self._write_loop, daemon=True)
+        self.thread.start()
+
+    def submit(self, payload, on_done=None):
+        """
+        Queue a command for sending.
+
+        :param payload: JSON-serialisable dict, a "cid" field is added
+        :param on_done: Called as on_done(command, reply) in the GUI thread,
+                        reply is None on timeout or write error
+        :return: Correlation id of the command
+        """
+        cid = next(self._cids)
+        self.outbox.put(PendingCommand(cid, dict(payload, cid=cid), on_done))
+        return cid
+
+    def _write_loop(self):
+        while True:
+            command = self.outbox.get()
+            data = (json.dumps(command.payload) + "\n").encode()
+            with self.lock:
+                self.pending[command.cid] = command
+            try:
+                self.ser.write(data)
+                command.sent = time.monotonic()
+            except Exception as e:
+                print(f"Command {command.cid} not sent: {e}")
+                with self.lock:
+                    self.pending.pop(command.cid, None)
+                self.completed.put((command, None))
+
+    def handle_reply(self, message):
+        """
+        Match a controller reply to its pending command.
+
+        :return: True if the reply belonged to a pending command
+        """
+        cid = message.get('cid')
+        with self.lock:
+            if cid is not None:
+                command = self.pending.pop(cid, None)
+            else:
+                command = None
+                number = message.get('command')
+                for candidate in self.pending.values():
+                    if candidate.payload.get('command') == number:
+                        command = self.pending.pop(candidate.cid)
+                        break
+        if command is None:
+            return False
+        command.latency = time.monotonic() - (command.sent or command.submitted)
+        self.latencies.append(command.latency)
+        self.completed.put((command, message))
+        return True
+
+    def expire(self):
+        """Fail commands that have waited longer than the timeout"""
+        deadline = time.monotonic() - self.timeout
+        with self.lock:
+            expired = [command for command in self.pending.values()
+                       if (command.sent or command.submitted) < deadline]
+            for command in expired:
+                del self.pending[command.cid]
+        for command in expired:
+            self.timeouts += 1
+            self.completed.put((command, None))
+
+    def process_completed(self):
+        """Run completion callbacks, call from the GUI thread"""
+        self.expire()
+        while True:
+            try:
+                command, reply = self.completed.get_nowait()
+            except Empty:
+                return
+            if command.on_done:
+                command.on_done(command, reply)
@@ -0,0 +1,34 @@
+from array import array
+
+# CRC-16/MODBUS: полином 0xA001 (отраженный 0x8005), начальное значение 0xFFFF
+_POLY = 0xA001
+
+
+def _make_table():
+    table = array('H', [0] * 256)
+    for i in range(256):
+        crc = i
+        for _ in range(8):
+            crc = (crc >> 1) ^ _POLY if crc & 1 else crc >> 1
+        table[i] = crc
+    return table
+
+
+_TABLE = _make_table()
+
+
+def crc16(data, crc=0xFFFF):
+    """
+    CRC-16/MODBUS по таблице, один просмотр таблицы на байт.
+
+    Args:
+        data (bytes | bytearray | memoryview): Данные
+        crc (int): Начальное значение, для продолжения расчета по частям
+
+    Returns:
+        int: CRC, в кадре Modbus передается младшим байтом вперед
+    """
+    table = _TABLE
+    for byte in data:
+        crc = (crc >> 8) ^ table[(crc ^ byte) & 0xFF]
+    return crc
@@ -1,12 +1,20 @@
+import argparse
 import tkinter as tk
 import random
 import threading
-from queue import Queue
+from collections import deque
 import time
 
 import serial
 import json
 
+from command_pipeline import CommandPipeline
+from sensor_queue import SensorQueue
+from sensor_registry import SensorRegistry, DEFAULT_CONFIG
+from serial_ingest import SerialIngest
+from serial_replay import SessionRecorder, ReplaySource
+from trend_plot import RingBuffer, TrendPlot
+
 def connect_to_serial_port(port, baudrate=115200):
     try:
         ser = serial.Serial(port, baudrate)
@@ -36,41 +44,102 @@ baud_rate = 115200
 serial_connection = connect_to_serial_port(serial_port, baud_rate)
 
 class LabPneumoStand(tk.Tk):
-    def __init__(self):
+    TREND_HEIGHT = 120
+    TREND_GAP = 10
+    SENSOR_COLUMNS = 5  # Sensor boxes per row, 100 px apart starting at x=250
+    SENSOR_ROW_HEIGHT = 60
+
+    def __init__(self, refresh_ms=50, verbose=False, show_trends=True,
+                 trend_span=3600.0, trend_refresh_ms=1000, history_capacity=500000,
+                 sensor_config=DEFAULT_CONFIG, record=None, replay=None, replay_speed=1.0,
+                 queue_size=1000, queue_policy=SensorQueue.LATEST, binary_telemetry=True):
         super().__init__()
-        self.geometry("755x252")
+        self.verbose = verbose  # Print every received serial message
+        self.binary_telemetry = binary_telemetry  # Offer binary frames, JSON stays the fallback
+        self.refresh_ms = refresh_ms  # Период обновления экрана, 50 мс = 20 Гц
+        self.trend_refresh_ms = trend_refresh_ms
+        self.registry = SensorRegistry.load(sensor_config)
+        trended = [spec.name for spec in self.registry if spec.trend] if show_trends else []
+
+        # Rows 0 and 1 sit above and below the pipe line, further rows go below them
+        rows = max(1, -(-len(self.registry) // self.SENSOR_COLUMNS))
+        sensors_bottom = 252 + max(0, rows - 2) * self.SENSOR_ROW_HEIGHT
+        height = sensors_bottom + len(trended) * (self.TREND_HEIGHT + self.TREND_GAP)
+        # Long sensor lists and many trends scroll instead of running off the screen
+        view_height = min(height, self.winfo_screenheight() - 80)
         self.title("Laboratory Pneumo Stand Control")
 
-        self.canvas = tk.Canvas(self, width=755, height=252)
-        self.canvas.pack()
+        self.canvas = tk.Canvas(self, width=755, height=view_height, scrollregion=(0, 0, 755, height))
+        scrollbar = tk.Scrollbar(self, orient='vertical', command=self.canvas.yview)
+        self.canvas.configure(yscrollcommand=scrollbar.set)
+        scrollbar.pack(side='right', fill='y')
+        self.canvas.pack(side='left', fill='both', expand=True)
+        self.canvas.bind_all('<MouseWheel>', self.on_mouse_wheel)
+        self.canvas.bind_all('<Button-4>', self.on_mouse_wheel)
+        self.canvas.bind_all('<Button-5>', self.on_mouse_wheel)
 
         self.canvas.create_line(50, 126, 705, 126, width=2)
 
         self.valve = self.canvas.create_polygon(50, 116, 65, 126, 50, 136, fill='green', outline='black')
         self.valve_status = tk.BooleanVar(value=True)
         self.valve_text = self.canvas.create_text(50, 150, text="ON", fill='green')
+        self.valve_pending = None  # cid of the unconfirmed valve command
 
         self.sensors = {
-            'velocity': {'id': 'V', 'rectangle': None, 'text': None, 'value': 0},
-            'temperature': {'id': 'T', 'rectangle': None, 'text': None, 'value': 0},
-            'pressure': {'id': 'P', 'rectangle': None, 'text': None, 'value': 0}
+            spec.name: {'id': spec.label, 'rectangle': None, 'text': None, 'value': 0, 'shown': None}
+            for spec in self.registry
         }
 
-        for sensor_id, sensor in self.sensors.items():
-            sensor_x = 250 + (100 * list(self.sensors.keys()).index(sensor_id))  # Adjust x-coordinate based on sensor position
-            sensor['rectangle'] = self.canvas.create_rectangle(sensor_x, 76, sensor_x + 40, 116, outline='black')
-            sensor['text'] = self.canvas.create_text(sensor_x + 20, 96, text=f"{sensor['value']}", fill='black')
+        # Positions are fixed, so canvas items are placed once here
+        for position, (spec, sensor) in enumerate(zip(self.registry, self.sensors.values())):
+            row, column = divmod(position, self.SENSOR_COLUMNS)
+            sensor_x = 250 + 100 * column
+            sensor_y = 76 if row == 0 else 136 + (row - 1) * self.SENSOR_ROW_HEIGHT
+            sensor['rectangle'] = self.canvas.create_rectangle(sensor_x, sensor_y, sensor_x + 40, sensor_y + 40, outline='black')
+            sensor['text'] = self.canvas.create_text(sensor_x + 20, sensor_y + 20, text=f"{sensor['value']}", fill='black')
+            caption = f"{spec.label}, {spec.units}" if spec.units else spec.label
+            self.canvas.create_text(sensor_x + 20, sensor_y - 8, text=caption, fill='gray25')
 
         self.initialize_sensors()
 
+        # Every sample goes to a fixed-size ring buffer, the plots show a decimated view
+        self.history = {sensor_id: RingBuffer(history_capacity) for sensor_id in trended}
+        self.trends = []
+        colors = ('blue', 'red', 'dark green', 'dark orange', 'purple')
+        for position, sensor_id in enumerate(trended):
+            y = sensors_bottom + position * (self.TREND_HEIGHT + self.TREND_GAP)
+            self.trends.append(TrendPlot(self.canvas, self.history[sensor_id], 50, y, 655,
+                                         self.TREND_HEIGHT, sensor_id,
+                                         colors[position % len(colors)], trend_span))
+
         self.toggle_valve_button = tk.Button(self, text="Toggle Valve", command=self.toggle_valve)
-        self.toggle_valve_button.place(x=35, y=170)
+        self.canvas.create_window(35, 170, window=self.toggle_valve_button, anchor='nw')
 
-        self.sensor_data_queue = Queue()
-        self.sensor_thread = threading.Thread(target=self.fetch_sensor_data, daemon=True)
+        # Queue items are (enqueue time, {sensor name: value}) for latency tracking;
+        # the queue is bounded so a stalled Tk loop cannot grow memory without limit
+        self.sensor_data_queue = SensorQueue(queue_size, queue_policy)
+        self.latencies = deque(maxlen=10000)
+        self.commands = CommandPipeline(serial_connection)
+        self.recorder = SessionRecorder(record) if record else None
+        self.ingest = SerialIngest(serial_connection, self.handle_messages, verbose=verbose,
+                                   recorder=self.recorder)
+        if replay:
+            # Replayed lines go through the same ingest and dispatch as live ones
+            self.replay = ReplaySource(replay, self.ingest.feed, speed=replay_speed)
+            self.sensor_thread = threading.Thread(target=self.replay.run, daemon=True)
+        else:
+            self.replay = None
+            self.sensor_thread = threading.Thread(target=self.fetch_sensor_data, daemon=True)
         self.sensor_thread.start()
 
         self.update_sensor_values_from_queue()
+        if self.trends:
+            self.update_trends()
+
+    def record_sample(self, sensor_id, value, timestamp):
+        history = self.history.get(sensor_id)
+        if history is not None and isinstance(value, (int, float)):
+            history.append(timestamp, value)
 
     def fetch_sensor_test_data(self):
         while True:
@@ -79,41 +148,93 @@ class LabPneumoStand(tk.Tk):
                 'temperature': random.randint(20, 30),
                 'pressure': random.randint(1, 10)
             }
-            self.sensor_data_queue.put(sensor_data)
+            now = time.monotonic()
+            for sensor_id, value in sensor_data.items():
+                self.record_sample(sensor_id, value, now)
+            self.sensor_data_queue.put((now, sensor_data))
             time.sleep(0.5)  # Simulate the delay of data fetching
 
     def fetch_sensor_data(self):
         if serial_connection:
-            while True:
-                value = None
-                received_message = receive_message(serial_connection)
-                parsed_message = parse_message(received_message)
-                if parsed_message:
-                    if parsed_message.get('sensor_id'):
-                        sensor_data = {}
-                        print(f"Received data: {received_message}")
-                        if parsed_message.get('sensor_id') == 1:
-                            sensor_data = {
-                                'velocity': parsed_message.get('value')
-                            }
-                        elif parsed_message.get('sensor_id') == 17:
-                            sensor_data = {
-                                'temperature': parsed_message.get('value')
-                            }
-                        self.sensor_data_queue.put(sensor_data)
-                    else:
-                        print(f"Received command: {received_message}")
-                    
+            if self.binary_telemetry:
+                self.ingest.request_binary()
+            self.ingest.run()
+
+    def handle_messages(self, messages):
+        # One queue item per parsed batch instead of one per message,
+        # while the trend history still keeps every sample
+        now = time.monotonic()
+        lookup = self.registry.by_id.get
+        sensor_data = {}
+        for message in messages:
+            sensor_id = message.get('sensor_id')
+            if not sensor_id:
+                if not self.commands.handle_reply(message):
+                    print(f"Received command: {message}")
+                continue
+            spec = lookup(sensor_id)
+            if spec is None:
+                continue  # Not configured in sensors.json
+            value = message.get('value')
+            if isinstance(value, (int, float)):
+                value = spec.convert(value)
+            sensor_data[spec.name] = value
+            self.record_sample(spec.name, value, now)
+        if sensor_data:
+            self.sensor_data_queue.put((time.monotonic(), sensor_data))
 
     def update_sensor_values_from_queue(self):
         try:
+            self.commands.process_completed()
+            # Coalesce the backlog: only the latest value of each sensor is drawn
+            latest = {}
+            enqueued = []
             while not self.sensor_data_queue.empty():
-                data = self.sensor_data_queue.get_nowait()
-                for sensor_id, value in data.items():
+                timestamp, sensor_data = self.sensor_data_queue.get_nowait()
+                enqueued.append(timestamp)
+                latest.update(sensor_data)
+            for sensor_id, value in latest.items():
+                if sensor_id in self.sensors:
                     self.sensors[sensor_id]['value'] = value
                     self.update_sensor(sensor_id)
+            if enqueued:
+                shown = time.monotonic()
+                self.latencies.extend(shown - timestamp for timestamp in enqueued)
         finally:
-            self.after(500, self.update_sensor_values_from_queue)
+            self.after(self.refresh_ms, self.update_sensor_values_from_queue)
+
+    def latency_summary(self):
+        """Queue-to-screen latency over the last 10000 queue items, in seconds"""
+        if not self.latencies:
+            return None
+        ordered = sorted(self.latencies)
+        return {
+            'p50': ordered[len(ordered) // 2],
+            'p99': ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))],
+            'max': ordered[-1],
+        }
+
+    def report_pipeline(self, period_ms=5000):
+        stats = self.ingest.stats()
+        queue = self.sensor_data_queue.stats()
+        latency = self.latency_summary()
+        line = (f"{stats['messages_per_sec']:.0f} msg/s, {stats['malformed']} malformed, "
+                f"{stats['dropped']} dropped, queue {queue['depth']}/{queue['maxsize']} "
+                f"(high {queue['high_water']}, {queue['dropped']} dropped, "
+                f"{queue['superseded']} superseded, {queue['policy']})")
+        if latency:
+            line += (f", latency p50 {latency['p50'] * 1000:.1f} ms, "
+                     f"p99 {latency['p99'] * 1000:.1f} ms, max {latency['max'] * 1000:.1f} ms")
+        print(line)
+        self.after(period_ms, self.report_pipeline, period_ms)
+
+    def update_trends(self):
+        try:
+            now = time.monotonic()
+            for trend in self.trends:
+                trend.redraw(now)
+        finally:
+            self.after(self.trend_refresh_ms, self.update_trends)
 
     def initialize_sensors(self):
         for sensor_id in self.sensors:
@@ -121,20 +242,62 @@ class LabPneumoStand(tk.Tk):
 
     def update_sensor(self, sensor_id):
         sensor = self.sensors[sensor_id]
-        value = sensor['value']
-        sensor_x = 250 + (100 * list(self.sensors.keys()).index(sensor_id))
-        self.canvas.coords(sensor['rectangle'], sensor_x, 76, sensor_x + 40, 116)
-        self.canvas.itemconfig(sensor['text'], text=f"{value}")
+        text = f"{sensor['value']}"
+        if text != sensor['shown']:  # Skip Tk work when the displayed text is unchanged
+            self.canvas.itemconfig(sensor['text'], text=text)
+            sensor['shown'] = text
+
+    def on_mouse_wheel(self, event):
+        # Windows and macOS report delta, X11 sends buttons 4 and 5
+        if event.num == 4 or event.delta > 0:
+            self.canvas.yview_scroll(-1, 'units')
+        elif event.num == 5 or event.delta < 0:
+            self.canvas.yview_scroll(1, 'units')
 
     def toggle_valve(self):
-        current_status = self.valve_status.get()
-        self.valve_status.set(not current_status)
+        if self.valve_pending is not None:
+            return  # Wait for the controller to confirm the previous toggle
+        self.valve_pending = self.commands.submit({"type": 1, "command": 17, "valve": 3, "result": 1},
+                                                  self.on_valve_reply)
+        self.canvas.itemconfig(self.valve, fill='yellow')
+        self.canvas.itemconfig(self.valve_text, text="...", fill='black')
+
+    def on_valve_reply(self, command, reply):
+        self.valve_pending = None
+        if reply is not None and reply.get('result', 1):
+            self.valve_status.set(not self.valve_status.get())
+            if self.verbose:
+                print(f"Valve command {command.cid} confirmed in {command.latency * 1000:.1f} ms")
+        else:
+            print(f"Valve command {command.cid} failed: {reply if reply is not None else 'no reply'}")
+        self.show_valve_state()
+
+    def show_valve_state(self):
+        # Reflects only controller-confirmed state
         new_color = 'green' if self.valve_status.get() else 'red'
         new_text = 'ON' if self.valve_status.get() else 'OFF'
-        send_message(serial_connection, json.dumps({"type": 1, "command": 17, "valve": 3, "result": 1}))
         self.canvas.itemconfig(self.valve, fill=new_color)
         self.canvas.itemconfig(self.valve_text, text=new_text, fill=new_color)
 
 if __name__ == "__main__":
-    app = LabPneumoStand()
-    app.mainloop()
+    parser = argparse.ArgumentParser(description="Laboratory pneumo stand control")
+    parser.add_argument('--record', help="Record the raw serial line stream to this file")
+    parser.add_argument('--replay', help="Replay a recorded session instead of reading the port")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed factor, 0 = as fast as possible")
+    parser.add_argument('--stats', action='store_true', help="Print ingest rate, queue and queue-to-screen latency")
+    parser.add_argument('--json-only', action='store_true', help="Do not offer binary telemetry framing")
+    parser.add_argument('--queue-size', type=int, default=1000, help="Bound of the sensor data queue")
+    parser.add_argument('--queue-policy', default=SensorQueue.LATEST, choices=SensorQueue.POLICIES,
+                        help="What to do when the sensor data queue is full")
+    args = parser.parse_args()
+
+    app = LabPneumoStand(record=args.record, replay=args.replay, replay_speed=args.speed,
+                         queue_size=args.queue_size, queue_policy=args.queue_policy,
+                         binary_telemetry=not args.json_only)
+    if args.stats:
+        app.report_pipeline()
+    try:
+        app.mainloop()
+    finally:
+        if app.recorder:
+            app.recorder.close()
@@ -1,8 +1,32 @@
+from array import array
 from utime import sleep_us, time
 from machine import Pin
 from micropython import const
 
 
+def _read_bits(sck, dout, bits, pulses):
+    """
+    Clock in bits data bits MSB first, then give the extra pulses that
+    select the next channel. sck and dout are bound Pin.value methods.
+    """
+    value = 0
+    for _ in range(bits):
+        sck(1)
+        sck(0)
+        value = (value << 1) | dout()
+    for _ in range(pulses):
+        sck(1)
+        sck(0)
+    return value
+
+
+try:
+    # Ports built without the native emitter fail to compile that module
+    from hx711_native import read_bits as _read_bits
+except (ImportError, SyntaxError, ValueError, AttributeError):
+    pass
+
+
 class HX711Exception(Exception):
     pass
 
@@ -29,10 +53,16 @@ class HX711(object):
     MIN_VALUE = const(0x800000)
     READY_TIMEOUT_SEC = const(5)
     SLEEP_DELAY_USEC = const(80)
+    MIN_CALIBRATION_COUNTS = const(100)  # Smallest load step calibrate() accepts, above the noise
 
     def __init__(self, d_out: int, pd_sck: int, channel: int = CHANNEL_A_128):
         self.d_out_pin = Pin(d_out, Pin.IN)
         self.pd_sck_pin = Pin(pd_sck, Pin.OUT, value=0)
+        # Bound once, the bit loop runs 48 clock and 24 data calls per sample
+        self._sck = self.pd_sck_pin.value
+        self._dout = self.d_out_pin.value
+        self.offset = 0
+        self.scale = 1
         self.channel = channel
 
     def __repr__(self):
@@ -54,9 +84,7 @@ class HX711(object):
         2 pulses for Channel B with gain 32
         1 pulse for Channel A with gain 128
         """
-        for i in range(self._channel):
-            self.pd_sck_pin.value(1)
-            self.pd_sck_pin.value(0)
+        _read_bits(self._sck, self._dout, 0, self._channel)
 
     def _wait(self):
         """
@@ -97,11 +125,7 @@ class HX711(object):
         if not self.is_ready():
             self._wait()
 
-        for i in range(self.DATA_BITS):
-            self.pd_sck_pin.value(1)
-            self.pd_sck_pin.value(0)
-
-        self._set_channel()
+        _read_bits(self._sck, self._dout, self.DATA_BITS, self._channel)
 
     def is_ready(self) -> bool:
         """
@@ -134,17 +158,76 @@ class HX711(object):
         if raw is True, the HX711 output will not be converted
         from two's complement format.
         """
-        if not self.is_ready():
+        if self._dout():
             self._wait()
 
-        raw_data = 0
-        for i in range(self.DATA_BITS):
-            self.pd_sck_pin.value(1)
-            self.pd_sck_pin.value(0)
-            raw_data = raw_data << 1 | self.d_out_pin.value()
-        self._set_channel()
+        raw_data = _read_bits(self._sck, self._dout, self.DATA_BITS, self._channel)
 
         if raw:
             return raw_data
         else:
             return self._convert_from_twos_complement(raw_data)
+
+    def read_many(self, n: int, buf=None):
+        """
+        Read n consecutive samples of the current channel into buf,
+        an array('i') of at least n items (allocated if None).
+        """
+        if buf is None:
+            buf = array('i', [0] * n)
+        sck = self._sck
+        dout = self._dout
+        bits = self.DATA_BITS
+        pulses = self._channel
+        sign = 1 << (bits - 1)
+        full = 1 << bits
+        for i in range(n):
+            if dout():
+                self._wait()
+            value = _read_bits(sck, dout, bits, pulses)
+            if value & sign:
+                value -= full
+            buf[i] = value
+        return buf
+
+    def read_average(self, n: int = 10, buf=None) -> float:
+        """
+        Mean of n samples, buf is passed on to read_many.
+        """
+        if n < 1:
+            raise ValueError('n should be at least 1')
+        buf = self.read_many(n, buf)
+        total = 0
+        for i in range(n):
+            total += buf[i]
+        return total / n
+
+    def tare(self, n: int = 10):
+        """
+        Take the current average as the zero offset.
+        """
+        self.offset = self.read_average(n)
+
+    def calibrate(self, known_weight: float, n: int = 10):
+        """
+        Set scale from a known weight placed after tare().
+        The scale is left unchanged if the weight barely moves the reading.
+        """
+        if not known_weight:
+            raise ValueError('known_weight should not be zero')
+        delta = self.read_average(n) - self.offset
+        if abs(delta) < self.MIN_CALIBRATION_COUNTS:
+            raise ValueError('Reading changed by %d counts, is the weight on the scale?' % delta)
+        self.scale = delta / known_weight
+
+    def get_value(self, n: int = 1) -> float:
+        """
+        Averaged reading minus the tare offset.
+        """
+        return self.read_average(n) - self.offset
+
+    def get_units(self, n: int = 1) -> float:
+        """
+        Averaged reading in calibrated units.
+        """
+        return self.get_value(n) / self.scale
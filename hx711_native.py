@@ -0,0 +1,18 @@
+import micropython
+
+
+@micropython.native
+def read_bits(sck, dout, bits, pulses):
+    """
+    Native-code twin of hx711._read_bits, imported by hx711 when the
+    port has the native emitter. sck and dout are bound Pin.value methods.
+    """
+    value = 0
+    for _ in range(bits):
+        sck(1)
+        sck(0)
+        value = (value << 1) | dout()
+    for _ in range(pulses):
+        sck(1)
+        sck(0)
+    return value
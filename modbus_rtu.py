@@ -0,0 +1,266 @@
+import struct
+import time
+
+import serial
+
+from crc16 import crc16
+from rs485_test import PTMRSSample
+
+# Карта регистров по умолчанию. Адреса различаются у разных моделей
+# преобразователей - сверьте с паспортом и при необходимости передайте
+# свою карту в ModbusRTUReader(registers=...).
+DEFAULT_REGISTERS = {
+    'pressure': 0x0000,     # float32, 2 регистра
+    'temperature': 0x0002,  # float32, 2 регистра
+    'status': 0x0004,       # uint16
+    'device_id': 0x0010,    # 3 регистра, 6 байт идентификатора (MAC)
+    'zero': 0x0020,         # запись 1 - установка нуля
+    'range': 0x0021,        # uint16, верхний предел диапазона
+}
+
+_READ_HOLDING = 0x03
+_WRITE_SINGLE = 0x06
+
+_EXCEPTIONS = {
+    0x01: "недопустимая функция",
+    0x02: "недопустимый адрес регистра",
+    0x03: "недопустимое значение",
+    0x04: "отказ устройства",
+    0x06: "устройство занято",
+}
+
+
+class ModbusError(Exception):
+    pass
+
+
+class ModbusRTUReader:
+    """
+    Чтение преобразователя давления по Modbus-RTU.
+
+    Методы совпадают с PTMRSReader. Давление, температура и состояние
+    лежат в соседних регистрах и читаются одним запросом функции 0x03.
+    """
+
+    def __init__(self, port='COM9', unit=1, baudrate=9600, timeout=0.5,
+                 registers=None, word_order='big'):
+        """
+        Args:
+            port (str): COM-порт
+            unit (int): Адрес устройства Modbus (1..247)
+            baudrate (int): Скорость передачи данных
+            timeout (float): Таймаут ожидания ответа в секундах
+            registers (dict): Карта регистров, по умолчанию DEFAULT_REGISTERS
+            word_order (str): 'big' - старшее слово float32 первым, 'little' - младшее
+        """
+        self.port = port
+        self.unit = unit
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.registers = dict(DEFAULT_REGISTERS, **(registers or {}))
+        self.word_order = word_order
+        self.connection = None
+        self.mac_address = None
+        self.last_rtt = None
+        self._request = bytearray(8)
+        # Пауза 3.5 символа между кадрами, не меньше 1.75 мс по спецификации
+        self._frame_gap = max(3.5 * 11 / baudrate, 0.00175)
+
+        pressure = self.registers['pressure']
+        temperature = self.registers['temperature']
+        status = self.registers['status']
+        self._block_start = min(pressure, temperature, status)
+        self._block_count = max(pressure + 2, temperature + 2, status + 1) - self._block_start
+
+    def connect(self):
+        """Установка соединения и чтение идентификатора устройства"""
+        try:
+            self.connection = serial.Serial(
+                port=self.port,
+                baudrate=self.baudrate,
+                bytesize=serial.EIGHTBITS,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE,
+                timeout=self.timeout
+            )
+            print(f"Подключено к {self.port} со скоростью {self.baudrate} бод")
+            self.get_mac_address()
+            return True
+
+        except serial.SerialException as e:
+            print(f"Ошибка подключения: {e}")
+            return False
+
+    def disconnect(self):
+        """Закрытие соединения"""
+        if self.connection and self.connection.is_open:
+            self.connection.close()
+            print("Соединение закрыто")
+
+    def _transaction(self, request, expected_len):
+        """Отправка кадра с CRC и чтение ответа известной длины"""
+        if not self.connection or not self.connection.is_open:
+            raise ModbusError("Соединение не установлено")
+
+        crc = crc16(request)
+        request.append(crc & 0xFF)
+        request.append(crc >> 8)
+
+        self.connection.reset_input_buffer()
+        start = time.monotonic()
+        self.connection.write(request)
+
+        # Первые 3 байта: адрес, функция и длина данных либо код исключения
+        head = self.connection.read(3)
+        if len(head) < 3:
+            raise ModbusError("Нет ответа от устройства")
+        if head[1] & 0x80:
+            self.connection.read(2)  # CRC кадра исключения
+            raise ModbusError(f"Исключение {head[2]}: {_EXCEPTIONS.get(head[2], 'неизвестно')}")
+
+        response = head + self.connection.read(expected_len - 3)
+        self.last_rtt = time.monotonic() - start
+        time.sleep(self._frame_gap)
+
+        if len(response) < expected_len:
+            raise ModbusError("Ответ неполный")
+        if crc16(response) != 0:
+            # CRC по кадру вместе с собственной CRC дает ноль
+            raise ModbusError("Ошибка CRC")
+        if response[0] != self.unit or response[1] != request[1]:
+            raise ModbusError("Ответ от другого устройства или на другую функцию")
+        return response
+
+    def read_registers(self, address, count):
+        """
+        Чтение группы регистров функцией 0x03
+
+        Returns:
+            bytes: Данные регистров, по 2 байта на регистр (big-endian)
+        """
+        request = self._request
+        request[:] = struct.pack('>BBHH', self.unit, _READ_HOLDING, address, count)
+        response = self._transaction(request, 5 + 2 * count)
+        return response[3:3 + 2 * count]
+
+    def write_register(self, address, value):
+        """Запись одного регистра функцией 0x06"""
+        request = self._request
+        request[:] = struct.pack('>BBHH', self.unit, _WRITE_SINGLE, address, value)
+        response = self._transaction(request, 8)
+        return response[2:6] == request[2:6]
+
+    def _float(self, data, offset):
+        if self.word_order == 'big':
+            return struct.unpack_from('>f', data, offset)[0]
+        return struct.unpack('>f', data[offset + 2:offset + 4] + data[offset:offset + 2])[0]
+
+    def read_sample(self, sample=None):
+        """
+        Давление, температура и состояние одним запросом
+
+        Args:
+            sample (PTMRSSample): Запись для повторного заполнения
+
+        Returns:
+            PTMRSSample: Показания или None при ошибке
+        """
+        try:
+            data = self.read_registers(self._block_start, self._block_count)
+        except ModbusError as e:
+            print(f"Ошибка чтения: {e}")
+            return None
+
+        if sample is None:
+            sample = PTMRSSample()
+        base = self._block_start
+        sample.pressure = self._float(data, 2 * (self.registers['pressure'] - base))
+        sample.temperature = self._float(data, 2 * (self.registers['temperature'] - base))
+        sample.status = struct.unpack_from('>H', data, 2 * (self.registers['status'] - base))[0]
+        return sample
+
+    def get_mac_address(self):
+        """Чтение 6-байтового идентификатора устройства"""
+        try:
+            data = self.read_registers(self.registers['device_id'], 3)
+        except ModbusError as e:
+            print(f"Не удалось прочитать идентификатор устройства: {e}")
+            return None
+        self.mac_address = data.hex().upper()
+        print(f"Идентификатор устройства: {self.mac_address}")
+        return self.mac_address
+
+    def get_pressure_and_status(self):
+        """
+        Получение текущего значения давления и состояния датчика
+
+        Returns:
+            dict: {'pressure': float, 'status': int, 'temperature': float,
+                   'rtt': float} или None при ошибке
+        """
+        sample = self.read_sample()
+        if sample is None:
+            return None
+        return {
+            'pressure': sample.pressure,
+            'status': sample.status,
+            'temperature': sample.temperature,
+            'rtt': self.last_rtt
+        }
+
+    def get_temperature(self):
+        """
+        Получение значения температуры
+
+        Returns:
+            float: Температура или None при ошибке
+        """
+        try:
+            data = self.read_registers(self.registers['temperature'], 2)
+        except ModbusError as e:
+            print(f"Ошибка чтения температуры: {e}")
+            return None
+        return self._float(data, 0)
+
+    def set_zero(self):
+        """Установка нуля датчика"""
+        try:
+            ok = self.write_register(self.registers['zero'], 1)
+        except ModbusError as e:
+            ok = False
+            print(f"Ошибка установки нуля: {e}")
+        if ok:
+            print("Ноль успешно установлен")
+        return ok
+
+    def set_range(self, pressure_value):
+        """
+        Установка диапазона измерения
+
+        Args:
+            pressure_value (int): Значение давления для установки диапазона
+        """
+        try:
+            ok = self.write_register(self.registers['range'], pressure_value)
+        except ModbusError as e:
+            ok = False
+            print(f"Ошибка установки диапазона: {e}")
+        if ok:
+            print(f"Диапазон успешно установлен: {pressure_value}")
+        return ok
+
+
+if __name__ == "__main__":
+    reader = ModbusRTUReader(port='COM9', unit=1)
+    if reader.connect():
+        try:
+            while True:
+                sample = reader.read_sample()
+                if sample:
+                    print(f"Давление: {sample.pressure:.4f}  Температура: {sample.temperature:.2f}  "
+                          f"Состояние: {sample.status:#06x}  ({reader.last_rtt * 1000:.1f} мс)")
+                time.sleep(1)
+        except KeyboardInterrupt:
+            print("\nОстановка чтения данных")
+        finally:
+            reader.disconnect()
@@ -0,0 +1,170 @@
+import argparse
+import asyncio
+import contextlib
+import io
+import re
+import time
+import timeit
+
+from ptm_rs_sim import PTMRSSimulator
+from rs485_test import PTMRSReader, PTMRSBus, PTMRSSample, parse_pressure
+from rs485_async import AsyncPTMRSReader
+
+
+def percentile(sorted_values, fraction):
+    """Перцентиль по отсортированному списку (ближайший ранг)"""
+    if not sorted_values:
+        return float('nan')
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def report(name, latencies, elapsed, errors):
+    """Вывод одной строки результатов"""
+    latencies.sort()
+    tps = len(latencies) / elapsed if elapsed > 0 else 0.0
+    print(f"{name:<10} {tps:>10.1f} {percentile(latencies, 0.5) * 1000:>10.2f} "
+          f"{percentile(latencies, 0.99) * 1000:>10.2f} {errors:>8}")
+
+
+def bench_parse(count):
+    """
+    Сравнение разбора ответа регулярным выражением и по раскладке
+
+    Раскладка предполагаемая (ответ имитатора), для реального датчика её
+    нужно сверить с записанным ответом. Строка fallback показывает цену
+    разбора ответа, который в раскладку не попал.
+    """
+    frame = bytearray(b'|+0012.3456 00;')
+    other = bytearray(b'|P=12.3456 ST=00;')
+
+    def regex_path():
+        # Прежний разбор get_pressure_and_status: декодирование, findall, словарь
+        response = frame.decode('ascii', errors='ignore').strip()
+        numbers = re.findall(r'-?\d+\.?\d*', response)
+        return {
+            'pressure': float(numbers[0]) if numbers else None,
+            'status': response,
+            'raw_response': response
+        }
+
+    sample = PTMRSSample()
+
+    def compact_path():
+        return parse_pressure(frame, sample)
+
+    def fallback_path():
+        return parse_pressure(other, sample)
+
+    print(f"{'разбор':<10} {'нс/ответ':>10}")
+    with contextlib.redirect_stdout(io.StringIO()):
+        parse_pressure(other)  # Предупреждение о первом несовпадении не мешает таблице
+    for name, func in (('regex', regex_path), ('compact', compact_path), ('fallback', fallback_path)):
+        elapsed = min(timeit.repeat(func, number=count, repeat=5))
+        print(f"{name:<10} {elapsed / count * 1e9:>10.0f}")
+
+
+def bench_reader(port, count, framed, compact=False):
+    """Запросы давления через PTMRSReader"""
+    reader = PTMRSReader(port=port, timeout=1, framed=framed)
+    request = reader.get_pressure_and_status
+    if compact:
+        sample = PTMRSSample()
+
+        def request():
+            return reader.read_sample(with_temperature=False, sample=sample)
+
+    latencies = []
+    errors = 0
+    # PTMRSReader печатает каждый ответ - в замер это не входит
+    with contextlib.redirect_stdout(io.StringIO()):
+        reader.connect()
+        start = time.perf_counter()
+        for _ in range(count):
+            t0 = time.perf_counter()
+            if request() is None:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+        reader.disconnect()
+    return latencies, elapsed, errors
+
+
+def bench_bus(port, mac_address, count):
+    """Запросы давления через PTMRSBus"""
+    bus = PTMRSBus(port=port, timeout=1)
+    latencies = []
+    errors = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        bus.connect()
+    device = bus.add_device(mac_address)
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        if bus.poll_device(device) is None:
+            errors += 1
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    with contextlib.redirect_stdout(io.StringIO()):
+        bus.disconnect()
+    return latencies, elapsed, errors
+
+
+def bench_async(port, count):
+    """Запросы давления через AsyncPTMRSReader"""
+    async def run():
+        reader = AsyncPTMRSReader(port=port, timeout=1)
+        await reader.connect()
+        latencies = []
+        errors = 0
+        start = time.perf_counter()
+        for _ in range(count):
+            t0 = time.perf_counter()
+            if await reader.get_pressure_and_status() is None:
+                errors += 1
+            latencies.append(time.perf_counter() - t0)
+        elapsed = time.perf_counter() - start
+        reader.disconnect()
+        return latencies, elapsed, errors
+
+    return asyncio.run(run())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Замер задержки и пропускной способности PTM-RS на имитаторе")
+    parser.add_argument('--count', type=int, default=200, help="Число запросов давления на режим")
+    parser.add_argument('--delay', type=float, default=0.002, help="Задержка ответа имитатора, с")
+    parser.add_argument('--jitter', type=float, default=0.001, help="Разброс задержки имитатора, с")
+    parser.add_argument('--modes', default='legacy,framed,sample,bus,async',
+                        help="Режимы через запятую: legacy, framed, sample, bus, async")
+    parser.add_argument('--parse', action='store_true',
+                        help="Только сравнить скорость разбора ответа, без имитатора")
+    args = parser.parse_args()
+
+    if args.parse:
+        bench_parse(max(args.count, 100000))
+        return
+
+    with PTMRSSimulator(delay=args.delay, jitter=args.jitter, noise=0.01) as simulator:
+        print(f"Имитатор: {simulator.port}, задержка {args.delay * 1000:.1f} мс "
+              f"+ до {args.jitter * 1000:.1f} мс")
+        print(f"{'режим':<10} {'запр/с':>10} {'p50, мс':>10} {'p99, мс':>10} {'ошибок':>8}")
+        for mode in args.modes.split(','):
+            mode = mode.strip()
+            if mode == 'legacy':
+                # Старый путь спит не меньше 100 мс на запрос - ограничиваем число запросов
+                report(mode, *bench_reader(simulator.port, min(args.count, 20), framed=False))
+            elif mode == 'framed':
+                report(mode, *bench_reader(simulator.port, args.count, framed=True))
+            elif mode == 'sample':
+                report(mode, *bench_reader(simulator.port, args.count, framed=True, compact=True))
+            elif mode == 'bus':
+                report(mode, *bench_bus(simulator.port, simulator.mac_address, args.count))
+            elif mode == 'async':
+                report(mode, *bench_async(simulator.port, args.count))
+            else:
+                print(f"Неизвестный режим: {mode}")
+
+
+if __name__ == "__main__":
+    main()
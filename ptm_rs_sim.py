@@ -0,0 +1,154 @@
+import os
+import random
+import threading
+import time
+import tty
+
+
+class PTMRSSimulator:
+    """
+    Имитатор датчика PTM-RS на псевдотерминале Linux.
+
+    Поддерживает команды :takemacadr;, опрос давления по MAC адресу,
+    :0060000000; (температура), :0010000000; (ноль) и :002000NNNN; (диапазон).
+    Путь к порту для PTMRSReader доступен в атрибуте port после start().
+
+    Формат ответов:
+        MAC:         |A1B2C3D4E5F6;
+        давление:    |+0012.3456 00;   (давление, код состояния)
+        температура: |+023.50;
+        ноль:        |0000000014;
+        диапазон:    |0000000015;
+    """
+
+    def __init__(self, mac_address='A1B2C3D4E5F6', pressure=1.0, temperature=23.5,
+                 delay=0.005, jitter=0.0, noise=0.0, status=0):
+        """
+        Args:
+            mac_address (str): MAC адрес имитируемого датчика
+            pressure (float): Давление без учета установки нуля
+            temperature (float): Температура
+            delay (float): Задержка ответа в секундах
+            jitter (float): Случайная добавка к задержке, 0..jitter секунд
+            noise (float): Амплитуда шума давления
+            status (int): Код состояния в ответе на запрос давления
+        """
+        self.mac_address = mac_address.upper()
+        self.pressure = pressure
+        self.temperature = temperature
+        self.delay = delay
+        self.jitter = jitter
+        self.noise = noise
+        self.status = status
+        self.zero_offset = 0.0
+        self.range_value = None
+        self.requests = 0
+        self.port = None
+        self._master = None
+        self._slave = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        """Создание псевдотерминала и запуск потока ответов"""
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.port = os.ttyname(self._slave)
+        self._running = True
+        self._thread = threading.Thread(target=self._serve, daemon=True)
+        self._thread.start()
+        return self.port
+
+    def stop(self):
+        """Остановка потока и закрытие псевдотерминала"""
+        self._running = False
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                try:
+                    os.close(fd)
+                except OSError:
+                    pass
+        self._master = self._slave = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _serve(self):
+        buffer = bytearray()
+        mac = self.mac_address.encode('ascii')
+        master = self._master  # stop() resets the attribute while this thread runs
+        while self._running:
+            try:
+                data = os.read(master, 256)
+            except OSError:
+                break
+            if not data:
+                break
+            buffer += data
+
+            while buffer:
+                if buffer[:1] == b':':
+                    end = buffer.find(b';')
+                    if end < 0:
+                        break
+                    command = bytes(buffer[:end + 1])
+                    del buffer[:end + 1]
+                    reply = self._handle_command(command)
+                elif len(buffer) >= len(mac):
+                    if buffer[:len(mac)].upper() == mac:
+                        reply = self._pressure_reply()
+                        del buffer[:len(mac)]
+                    else:
+                        # Мусор на линии - сдвигаемся на байт и ищем начало команды
+                        del buffer[:1]
+                        continue
+                else:
+                    break
+
+                if reply is not None:
+                    self._respond(master, reply)
+
+    def _handle_command(self, command):
+        if command == b':takemacadr;':
+            return f"|{self.mac_address};"
+        if command == b':0060000000;':
+            return f"|{self.temperature:+07.2f};"
+        if command == b':0010000000;':
+            self.zero_offset = self.pressure
+            return "|0000000014;"
+        if command.startswith(b':002000') and len(command) == 12:
+            self.range_value = int(command[7:11])
+            return "|0000000015;"
+        return None
+
+    def _pressure_reply(self):
+        pressure = self.pressure - self.zero_offset
+        if self.noise:
+            pressure += random.uniform(-self.noise, self.noise)
+        return f"|{pressure:+010.4f} {self.status:02d};"
+
+    def _respond(self, master, reply):
+        self.requests += 1
+        delay = self.delay + (random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+        if not self._running:
+            return  # Остановлен во время задержки, дескриптор уже закрыт
+        try:
+            os.write(master, reply.encode('ascii'))
+        except OSError:
+            pass
+
+
+if __name__ == "__main__":
+    simulator = PTMRSSimulator(noise=0.01)
+    print(f"Имитатор PTM-RS запущен на {simulator.start()}. Нажмите Ctrl+C для остановки.")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        simulator.stop()
@@ -0,0 +1,264 @@
+import asyncio
+import os
+import re
+import sys
+import time
+
+import serial
+
+from rs485_test import DiscoveryCache, parse_pressure, parse_temperature
+
+
+class AsyncPTMRSReader:
+    """
+    Асинхронное чтение датчика PTM-RS.
+
+    Порт открывается в неблокирующем режиме, прием идет через
+    loop.add_reader, поэтому один процесс может опрашивать много линий
+    одновременно без отдельного потока на каждый порт. Работает только на
+    POSIX системах (Linux), где дескриптор порта поддерживает select/epoll.
+    """
+
+    def __init__(self, port='/dev/ttyUSB0', baudrate=9600, timeout=2, cache=None):
+        """
+        Args:
+            port (str): Путь к порту (например, '/dev/ttyUSB0')
+            baudrate (int): Скорость передачи данных
+            timeout (float): Таймаут ожидания ответа в секундах
+            cache (DiscoveryCache): Кэш MAC адресов, None - без кэша
+        """
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.connection = None
+        self.mac_address = None
+        self.mac_from_cache = False
+        self.cache = cache
+        self.cache_key = DiscoveryCache.make_key(port, baudrate)
+        self.last_rtt = None
+        self._fd = None
+        self._loop = None
+        self._lock = asyncio.Lock()
+        self._rx_buffer = bytearray()
+        self._waiter = None
+
+    async def connect(self):
+        """Открытие порта и получение MAC адреса"""
+        try:
+            self.connection = serial.Serial(
+                port=self.port,
+                baudrate=self.baudrate,
+                bytesize=serial.EIGHTBITS,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE,
+                timeout=0
+            )
+        except serial.SerialException as e:
+            print(f"Ошибка подключения {self.port}: {e}")
+            return False
+
+        self._loop = asyncio.get_running_loop()
+        self._fd = self.connection.fileno()
+        os.set_blocking(self._fd, False)
+        self._loop.add_reader(self._fd, self._on_readable)
+
+        entry = self.cache.get(self.cache_key) if self.cache else None
+        if entry and entry.get('mac_address'):
+            self.mac_address = entry['mac_address']
+            self.mac_from_cache = True
+        else:
+            await self.get_mac_address()
+        return True
+
+    def disconnect(self):
+        """Закрытие порта"""
+        if self._fd is not None:
+            self._loop.remove_reader(self._fd)
+            self._fd = None
+        if self.connection and self.connection.is_open:
+            self.connection.close()
+
+    def _on_readable(self):
+        """Обработчик готовности дескриптора к чтению"""
+        try:
+            data = os.read(self._fd, 256)
+        except BlockingIOError:
+            return
+        except OSError as e:
+            if self._waiter and not self._waiter.done():
+                self._waiter.set_exception(e)
+            return
+
+        if self._waiter is None or self._waiter.done():
+            # Ответ без запроса (эхо, помехи на линии) отбрасываем
+            return
+
+        self._rx_buffer += data
+        if b';' in data or b'\n' in data:
+            self._waiter.set_result(self._rx_buffer.decode('ascii', errors='ignore').strip())
+
+    async def _write(self, data):
+        """Запись без блокировки, при заполненном буфере ждем готовности"""
+        view = memoryview(data)
+        while view:
+            try:
+                written = os.write(self._fd, view)
+                view = view[written:]
+            except BlockingIOError:
+                writable = self._loop.create_future()
+                self._loop.add_writer(self._fd, writable.set_result, None)
+                try:
+                    await writable
+                finally:
+                    self._loop.remove_writer(self._fd)
+
+    async def transaction(self, command, timeout=None):
+        """
+        Отправка команды и ожидание ответа до терминатора
+
+        Returns:
+            str: Ответ или None при таймауте
+        """
+        if self._fd is None:
+            print("Соединение не установлено")
+            return None
+
+        async with self._lock:
+            self._rx_buffer.clear()
+            self._waiter = self._loop.create_future()
+            start = time.monotonic()
+            try:
+                await self._write(command.encode('ascii'))
+                response = await asyncio.wait_for(self._waiter, timeout or self.timeout)
+            except (asyncio.TimeoutError, OSError):
+                self.last_rtt = None
+                return None
+            finally:
+                self._waiter = None
+            self.last_rtt = time.monotonic() - start
+            return response
+
+    async def get_mac_address(self):
+        """Получение MAC адреса устройства"""
+        response = await self.transaction(":takemacadr;")
+        if response:
+            mac_match = re.search(r'[A-Fa-f0-9]{12}', response)
+            if mac_match:
+                self.mac_address = mac_match.group(0)
+                self.mac_from_cache = False
+                if self.cache:
+                    self.cache.update(self.cache_key, mac_address=self.mac_address)
+                return self.mac_address
+        print(f"{self.port}: не удалось получить MAC адрес. Ответ: {response}")
+        return None
+
+    async def get_pressure_and_status(self):
+        """
+        Получение текущего значения давления и состояния датчика
+
+        Returns:
+            dict: {'pressure': float, 'status': str, 'status_code': int, 'rtt': float}
+                или None при ошибке
+        """
+        if not self.mac_address:
+            return None
+
+        response = await self.transaction(self.mac_address)
+        if not response:
+            if self.mac_from_cache:
+                # MAC из кэша не отвечает - запрашиваем адрес заново
+                if self.cache:
+                    self.cache.invalidate(self.cache_key)
+                self.mac_from_cache = False
+                if await self.get_mac_address():
+                    return await self.get_pressure_and_status()
+            return None
+
+        sample = parse_pressure(response.encode('ascii', errors='ignore'))
+        return {
+            'pressure': sample.pressure if sample else None,
+            'status': response,
+            'status_code': sample.status if sample else None,
+            'raw_response': response,
+            'rtt': self.last_rtt
+        }
+
+    async def get_temperature(self):
+        """
+        Получение значения температуры
+
+        Returns:
+            float: Температура или None при ошибке
+        """
+        response = await self.transaction(":0060000000;")
+        if not response:
+            return None
+
+        return parse_temperature(response.encode('ascii', errors='ignore'))
+
+    async def set_zero(self):
+        """Установка нуля датчика"""
+        response = await self.transaction(":0010000000;")
+        ok = bool(response) and "|0000000014" in response
+        if ok and self.cache and self.mac_address:
+            self.cache.update(self.cache_key, mac_address=self.mac_address,
+                              zero_set_at=time.time())
+        return ok
+
+    async def set_range(self, pressure_value):
+        """
+        Установка диапазона измерения
+
+        Args:
+            pressure_value (int): Значение давления для установки диапазона
+        """
+        response = await self.transaction(f":002000{pressure_value:04d};")
+        ok = bool(response) and "|0000000015" in response
+        if ok and self.cache and self.mac_address:
+            self.cache.update(self.cache_key, mac_address=self.mac_address,
+                              range=pressure_value)
+        return ok
+
+
+async def poll_ports(ports, interval=1.0, baudrate=9600, cache=None):
+    """
+    Одновременный опрос датчиков на нескольких портах
+
+    Args:
+        ports (list): Список портов, по одному датчику на порт
+        interval (float): Интервал между циклами опроса в секундах
+        baudrate (int): Скорость передачи данных
+        cache (DiscoveryCache): Общий кэш MAC адресов
+    """
+    readers = [AsyncPTMRSReader(port, baudrate, cache=cache) for port in ports]
+    connected = await asyncio.gather(*(reader.connect() for reader in readers))
+    active = []
+    for reader, ok in zip(readers, connected):
+        if ok and reader.mac_address:
+            active.append(reader)
+        else:
+            reader.disconnect()  # Порт мог открыться без ответа датчика
+    readers = active
+
+    async def poll(reader):
+        pressure_data = await reader.get_pressure_and_status()
+        temperature = await reader.get_temperature()
+        return reader, pressure_data, temperature
+
+    try:
+        while True:
+            cycle_start = time.monotonic()
+            for reader, pressure_data, temperature in await asyncio.gather(*(poll(r) for r in readers)):
+                pressure = pressure_data['pressure'] if pressure_data else None
+                print(f"{reader.port} [{reader.mac_address}]: давление {pressure}, температура {temperature}")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - cycle_start)))
+    finally:
+        for reader in readers:
+            reader.disconnect()
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(poll_ports(sys.argv[1:] or ['/dev/ttyUSB0'], cache=DiscoveryCache()))
+    except KeyboardInterrupt:
+        print("\nОстановка опроса")
@@ -2,9 +2,208 @@ import serial
 import time
 import sys
 import re
+import os
+import json
+
+_NUMBER_RE = re.compile(r'-?\d+\.?\d*')
+
+# ПРЕДПОЛАГАЕМАЯ раскладка ответов, по ней же отвечает имитатор ptm_rs_sim.
+# Документации на ответ PTM-RS в проекте нет, формат зависит от модели -
+# раскладку нужно сверить с записанным ответом реального датчика. Пока она
+# не подтверждена, ответы другого вида уходят в разбор регулярным
+# выражением; такие случаи считаются в PARSE_STATS['fallback'], а первый
+# из них печатается, чтобы несовпадение было видно.
+#
+# Давление: |+0012.3456 00;
+#   [0]      '|'
+#   [1:11]   давление со знаком, 4 знака после точки
+#   [12:14]  код состояния
+#   [14]     терминатор ';' (или '\\r', '\\n'), может быть уже отрезан
+_PRESSURE_FRAME_LEN = 15
+# Температура: |+023.50;
+_TEMPERATURE_FRAME_LEN = 9
+_FRAME_START = ord('|')
+_FRAME_ENDS = (ord(';'), ord('\r'), ord('\n'))
+
+PARSE_STATS = {'layout': 0, 'fallback': 0}
+
+
+def _parse_fallback(frame):
+    """Первое число ответа неизвестного вида"""
+    text = bytes(frame).decode('ascii', errors='ignore')
+    if not PARSE_STATS['fallback']:
+        print(f"Ответ не совпал с предполагаемой раскладкой, разбор по числам: {text.strip()!r}")
+    PARSE_STATS['fallback'] += 1
+    numbers = _NUMBER_RE.findall(text)
+    return float(numbers[0]) if numbers else None
+
+
+def _has_layout(frame, length):
+    """Ответ длины length с терминатором или length - 1 без него"""
+    size = len(frame)
+    if not size or frame[0] != _FRAME_START:
+        return False
+    return size == length - 1 or (size == length and frame[length - 1] in _FRAME_ENDS)
+
+
+class PTMRSSample:
+    """Показания датчика: давление, код состояния и температура"""
+
+    __slots__ = ('pressure', 'status', 'temperature')
+
+    def __init__(self, pressure=None, status=None, temperature=None):
+        self.pressure = pressure
+        self.status = status
+        self.temperature = temperature
+
+    def __repr__(self):
+        return (f"PTMRSSample(pressure={self.pressure}, status={self.status}, "
+                f"temperature={self.temperature})")
+
+
+def parse_pressure(frame, sample=None):
+    """
+    Разбор ответа на запрос давления прямо из принятых байт
+
+    Ответ предполагаемой раскладки разбирается срезами без декодирования
+    строки. Ответ другого вида разбирается регулярным выражением и
+    учитывается в PARSE_STATS['fallback'], код состояния при этом не
+    заполняется.
+
+    Args:
+        frame (bytes | bytearray): Принятый ответ вместе с терминатором
+        sample (PTMRSSample): Запись для заполнения, None - создать новую
+
+    Returns:
+        PTMRSSample: Запись или None, если давление не найдено
+    """
+    if sample is None:
+        sample = PTMRSSample()
+    if _has_layout(frame, _PRESSURE_FRAME_LEN):
+        try:
+            sample.pressure = float(frame[1:11])
+            sample.status = int(frame[12:14])
+            PARSE_STATS['layout'] += 1
+            return sample
+        except ValueError:
+            pass
+
+    pressure = _parse_fallback(frame)
+    if pressure is None:
+        return None
+    sample.pressure = pressure
+    sample.status = None
+    return sample
+
+
+def parse_temperature(frame):
+    """
+    Разбор ответа на запрос температуры прямо из принятых байт
+
+    Returns:
+        float: Температура или None
+    """
+    if _has_layout(frame, _TEMPERATURE_FRAME_LEN):
+        try:
+            temperature = float(frame[1:8])
+            PARSE_STATS['layout'] += 1
+            return temperature
+        except ValueError:
+            pass
+
+    return _parse_fallback(frame)
+
+
+def read_frame(connection, buffer, timeout):
+    """
+    Чтение одного ответа до терминатора ';' или '\\n'
+
+    Используются блокирующие чтения: первый байт ждется не дольше таймаута
+    порта, межбайтовый интервал ограничен inter_byte_timeout порта.
+
+    Args:
+        connection (serial.Serial): Открытый порт
+        buffer (bytearray): Переиспользуемый буфер, очищается перед чтением
+        timeout (float): Общий предел времени чтения в секундах
+
+    Returns:
+        bool: True, если получен терминатор
+    """
+    buffer.clear()
+    deadline = time.monotonic() + timeout
+    while True:
+        chunk = connection.read(connection.in_waiting or 1)
+        if not chunk:
+            return False
+        buffer += chunk
+        if b';' in chunk or b'\n' in chunk:
+            return True
+        if time.monotonic() >= deadline:
+            return False
+
+
+class DiscoveryCache:
+    """
+    Кэш найденных датчиков на диске.
+
+    Ключ записи - порт и параметры линии, значение - MAC адрес и последние
+    установленные диапазон и ноль. Позволяет не запрашивать :takemacadr;
+    при каждом подключении.
+    """
+
+    def __init__(self, path='ptm_rs_cache.json'):
+        """
+        Args:
+            path (str): Путь к JSON файлу кэша
+        """
+        self.path = path
+        self._entries = self._load()
+
+    @staticmethod
+    def make_key(port, baudrate, bytesize=serial.EIGHTBITS,
+                 parity=serial.PARITY_NONE, stopbits=serial.STOPBITS_ONE):
+        """Ключ записи, например 'COM9@9600-8N1'"""
+        return f"{port}@{baudrate}-{bytesize}{parity}{stopbits}"
+
+    def _load(self):
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                entries = json.load(f)
+            return entries if isinstance(entries, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save(self):
+        # Пишем во временный файл и подменяем, чтобы не оставить битый кэш
+        tmp_path = self.path + '.tmp'
+        try:
+            with open(tmp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._entries, f, indent=2, ensure_ascii=False)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            print(f"Ошибка записи кэша {self.path}: {e}")
+
+    def get(self, key):
+        """Запись кэша или None"""
+        return self._entries.get(key)
+
+    def update(self, key, **fields):
+        """Обновление полей записи с сохранением на диск"""
+        entry = self._entries.setdefault(key, {})
+        entry.update(fields)
+        entry['updated'] = time.time()
+        self._save()
+        return entry
+
+    def invalidate(self, key):
+        """Удаление записи, например если датчик перестал отвечать"""
+        if self._entries.pop(key, None) is not None:
+            self._save()
+
 
 class PTMRSReader:
-    def __init__(self, port='COM9', baudrate=9600, timeout=2):
+    def __init__(self, port='COM9', baudrate=9600, timeout=2, framed=False,
+                 inter_byte_timeout=0.05, cache=None, verbose=False):
         """
         Инициализация подключения к датчику PTM-RS
         
@@ -12,12 +211,28 @@ class PTMRSReader:
             port (str): COM-порт (например, 'COM9' для Windows или '/dev/ttyUSB0' для Linux)
             baudrate (int): Скорость передачи данных (обычно 9600 для PTM-RS)
             timeout (float): Таймаут ожидания ответа в секундах
+            framed (bool): Читать ответ до терминатора без фиксированных пауз
+            inter_byte_timeout (float): Предельная пауза между байтами ответа
+                в режиме framed
+            cache (DiscoveryCache): Кэш MAC адресов и настроек, None - без кэша
+            verbose (bool): Печатать каждый ответ на запрос давления
         """
         self.port = port
         self.baudrate = baudrate
         self.timeout = timeout
+        self.framed = framed
+        self.inter_byte_timeout = inter_byte_timeout
         self.connection = None
         self.mac_address = None
+        self.mac_from_cache = False
+        self.range_value = None
+        self.zero_set_at = None
+        self.cache = cache
+        self.cache_key = DiscoveryCache.make_key(port, baudrate)
+        self.last_rtt = None
+        self.verbose = verbose
+        self._sent_at = None
+        self._rx_buffer = bytearray()
         
     def connect(self):
         """Установка соединения с датчиком"""
@@ -28,12 +243,14 @@ class PTMRSReader:
                 bytesize=serial.EIGHTBITS,
                 parity=serial.PARITY_NONE,
                 stopbits=serial.STOPBITS_ONE,
-                timeout=self.timeout
+                timeout=self.timeout,
+                inter_byte_timeout=self.inter_byte_timeout if self.framed else None
             )
             print(f"Подключено к {self.port} со скоростью {self.baudrate} бод")
             
-            # Получаем MAC адрес устройства
-            self.get_mac_address()
+            # Берем MAC адрес из кэша, если датчик уже находили на этом порту
+            if not self._load_from_cache():
+                self.get_mac_address()
             return True
             
         except serial.SerialException as e:
@@ -46,6 +263,27 @@ class PTMRSReader:
             self.connection.close()
             print("Соединение закрыто")
     
+    def _load_from_cache(self):
+        """Восстановление MAC адреса и настроек из кэша"""
+        entry = self.cache.get(self.cache_key) if self.cache else None
+        if not entry or not entry.get('mac_address'):
+            return False
+        
+        self.mac_address = entry['mac_address']
+        self.range_value = entry.get('range')
+        self.zero_set_at = entry.get('zero_set_at')
+        self.mac_from_cache = True
+        print(f"MAC адрес из кэша: {self.mac_address}")
+        return True
+    
+    def rediscover(self):
+        """Сброс записи кэша и повторный запрос MAC адреса"""
+        if self.cache:
+            self.cache.invalidate(self.cache_key)
+        self.mac_address = None
+        self.mac_from_cache = False
+        return self.get_mac_address()
+    
     def send_command(self, command):
         """
         Отправка команды датчику
@@ -64,9 +302,11 @@ class PTMRSReader:
             # Отправляем команду
             self.connection.write(command.encode('ascii'))
             self.connection.flush()
+            self._sent_at = time.monotonic()
             
-            # Даем время на обработку
-            time.sleep(0.1)
+            # Даем время на обработку, в режиме framed ждем терминатор в read_response
+            if not self.framed:
+                time.sleep(0.1)
             return True
             
         except Exception as e:
@@ -82,6 +322,11 @@ class PTMRSReader:
         """
         if not self.connection or not self.connection.is_open:
             return None
+        
+        if self.framed:
+            if self._read_framed(timeout) is None:
+                return None
+            return self._rx_buffer.decode('ascii', errors='ignore').strip()
             
         try:
             # Устанавливаем таймаут если передан
@@ -107,6 +352,9 @@ class PTMRSReader:
             # Восстанавливаем исходный таймаут
             if timeout:
                 self.connection.timeout = old_timeout
+            
+            if self._sent_at is not None:
+                self.last_rtt = time.monotonic() - self._sent_at
                 
             return response.strip()
             
@@ -114,6 +362,34 @@ class PTMRSReader:
             print(f"Ошибка чтения ответа: {e}")
             return None
     
+    def _read_framed(self, timeout=None):
+        """
+        Чтение ответа до терминатора в переиспользуемый буфер
+        
+        Returns:
+            bool: True, если получен полный ответ, None при ошибке порта
+        """
+        try:
+            if timeout:
+                old_timeout = self.connection.timeout
+                self.connection.timeout = timeout
+            
+            complete = read_frame(self.connection, self._rx_buffer, timeout or self.timeout)
+            
+            if timeout:
+                self.connection.timeout = old_timeout
+            
+            if complete and self._sent_at is not None:
+                self.last_rtt = time.monotonic() - self._sent_at
+            else:
+                self.last_rtt = None
+            
+            return complete
+            
+        except Exception as e:
+            print(f"Ошибка чтения ответа: {e}")
+            return None
+    
     def get_mac_address(self):
         """Получение MAC адреса устройства"""
         print("Получение MAC адреса устройства...")
@@ -126,7 +402,10 @@ class PTMRSReader:
             mac_match = re.search(r'[A-Fa-f0-9]{12}', response)
             if mac_match:
                 self.mac_address = mac_match.group(0)
+                self.mac_from_cache = False
                 print(f"MAC адрес устройства: {self.mac_address}")
+                if self.cache:
+                    self.cache.update(self.cache_key, mac_address=self.mac_address)
                 return self.mac_address
             else:
                 print(f"Неожиданный формат ответа MAC: {response}")
@@ -140,7 +419,9 @@ class PTMRSReader:
         Получение текущего значения давления и состояния датчика
         
         Returns:
-            dict: {'pressure': float, 'status': str} или None при ошибке
+            dict: {'pressure': float, 'status': str, 'status_code': int} или
+                None при ошибке; status_code равен None, если ответ не совпал
+                с предполагаемой раскладкой (см. parse_pressure)
         """
         if not self.mac_address:
             print("MAC адрес не получен")
@@ -151,34 +432,73 @@ class PTMRSReader:
         
         response = self.read_response()
         if response:
-            try:
-                # Парсим ответ - формат зависит от конкретной модели
-                # Обычно в ответе содержится давление и статус
+            # Формат зависит от конкретной модели, см. parse_pressure
+            if self.verbose:
                 print(f"Ответ датчика: {response}")
-                
-                # Попытка извлечь числовые значения из ответа
-                numbers = re.findall(r'-?\d+\.?\d*', response)
-                if numbers:
-                    pressure = float(numbers[0]) if numbers else 0.0
-                    return {
-                        'pressure': pressure,
-                        'status': response,
-                        'raw_response': response
-                    }
-                else:
-                    return {
-                        'pressure': None,
-                        'status': response,
-                        'raw_response': response
-                    }
-                    
-            except Exception as e:
-                print(f"Ошибка парсинга ответа: {e}")
-                return None
+            sample = parse_pressure(response.encode('ascii', errors='ignore'))
+            return {
+                'pressure': sample.pressure if sample else None,
+                'status': response,
+                'status_code': sample.status if sample else None,
+                'raw_response': response,
+                'rtt': self.last_rtt
+            }
+        elif self.mac_from_cache:
+            # Датчик на порту могли заменить - MAC из кэша больше не отвечает
+            print("Нет ответа по MAC адресу из кэша, повторное определение")
+            if self.rediscover():
+                return self.get_pressure_and_status()
+            return None
         else:
             print("Не получен ответ от датчика")
             return None
     
+    def _request_frame(self, command):
+        """Запрос с ответом в виде байт, без печати и декодирования"""
+        if not self.send_command(command):
+            return None
+        if self.framed:
+            return self._rx_buffer if self._read_framed() else None
+        response = self.read_response()
+        return response.encode('ascii') if response else None
+    
+    def read_sample(self, with_temperature=True, sample=None):
+        """
+        Быстрое чтение давления, кода состояния и температуры
+        
+        В отличие от get_pressure_and_status ответ не печатается и
+        разбирается по фиксированной раскладке прямо из принятых байт.
+        
+        Args:
+            with_temperature (bool): Запрашивать также температуру
+            sample (PTMRSSample): Запись для повторного заполнения
+        
+        Returns:
+            PTMRSSample: Показания или None при ошибке
+        """
+        if not self.mac_address:
+            return None
+        
+        frame = self._request_frame(self.mac_address)
+        if not frame:
+            return None
+        sample = parse_pressure(frame, sample)
+        if sample is None:
+            return None
+        
+        sample.temperature = self.read_temperature() if with_temperature else None
+        return sample
+    
+    def read_temperature(self):
+        """
+        Быстрое чтение температуры без печати ответа
+        
+        Returns:
+            float: Температура или None при ошибке
+        """
+        frame = self._request_frame(":0060000000;")
+        return parse_temperature(frame) if frame else None
+    
     def get_temperature(self):
         """
         Получение значения температуры
@@ -191,18 +511,10 @@ class PTMRSReader:
         
         response = self.read_response()
         if response:
-            try:
-                # Извлекаем числовое значение температуры
-                numbers = re.findall(r'-?\d+\.?\d*', response)
-                if numbers:
-                    temperature = float(numbers[0])
-                    return temperature
-                else:
-                    print(f"Не удалось извлечь температуру из ответа: {response}")
-                    return None
-            except Exception as e:
-                print(f"Ошибка парсинга температуры: {e}")
-                return None
+            temperature = parse_temperature(response.encode('ascii', errors='ignore'))
+            if temperature is None:
+                print(f"Не удалось извлечь температуру из ответа: {response}")
+            return temperature
         else:
             print("Не получен ответ на запрос температуры")
             return None
@@ -217,6 +529,10 @@ class PTMRSReader:
         
         if response and expected_response in response:
             print("Ноль успешно установлен")
+            self.zero_set_at = time.time()
+            if self.cache and self.mac_address:
+                self.cache.update(self.cache_key, mac_address=self.mac_address,
+                                  zero_set_at=self.zero_set_at)
             return True
         else:
             print(f"Ошибка установки нуля. Ответ: {response}")
@@ -238,27 +554,42 @@ class PTMRSReader:
         
         if response and expected_response in response:
             print(f"Диапазон успешно установлен: {pressure_value}")
+            self.range_value = pressure_value
+            if self.cache and self.mac_address:
+                self.cache.update(self.cache_key, mac_address=self.mac_address,
+                                  range=pressure_value)
             return True
         else:
             print(f"Ошибка установки диапазона. Ответ: {response}")
             return False
     
-    def continuous_reading(self, interval=2):
+    def continuous_reading(self, interval=2, max_failures=3):
         """
         Непрерывное чтение показаний датчика
         
         Args:
             interval (float): Интервал между чтениями в секундах
+            max_failures (int): Число ошибок подряд, после которого MAC адрес
+                запрашивается заново
         """
         print("Начинаем непрерывное чтение данных. Нажмите Ctrl+C для остановки.")
         print("="*60)
         
+        failures = 0
         try:
             while True:
                 timestamp = time.strftime("%Y-%m-%d %H:%M:%S")
                 
                 # Читаем давление и статус
                 pressure_data = self.get_pressure_and_status()
+                if pressure_data:
+                    failures = 0
+                else:
+                    failures += 1
+                    if failures >= max_failures:
+                        print("Датчик не отвечает, повторное определение MAC адреса")
+                        self.rediscover()
+                        failures = 0
                 
                 # Читаем температуру
                 temperature = self.get_temperature()
@@ -269,6 +600,8 @@ class PTMRSReader:
                     if pressure_data['pressure'] is not None:
                         print(f"  Давление: {pressure_data['pressure']}")
                     print(f"  Статус: {pressure_data['status']}")
+                    if pressure_data['rtt'] is not None:
+                        print(f"  Время ответа: {pressure_data['rtt'] * 1000:.1f} мс")
                 else:
                     print("  Ошибка чтения давления")
                 
@@ -282,6 +615,372 @@ class PTMRSReader:
                 
         except KeyboardInterrupt:
             print("\nОстановка чтения данных")
+    
+    def adaptive_reading(self, pressure_interval=1.0, temperature_interval=10.0,
+                         pressure_deadband=0.01, temperature_deadband=0.1,
+                         min_factor=0.1, max_factor=4.0, heartbeat=60.0,
+                         sink=None, max_failures=3):
+        """
+        Чтение с зоной нечувствительности и подстройкой интервала опроса
+        
+        Давление и температура опрашиваются независимо. Пока величина
+        меняется больше зоны нечувствительности, интервал ее опроса
+        сокращается, на ровном сигнале - растет. В sink передаются только
+        значения, вышедшие за зону относительно последнего переданного,
+        и не реже одного раза за heartbeat секунд.
+        
+        Args:
+            pressure_interval (float): Базовый интервал опроса давления, с
+            temperature_interval (float): Базовый интервал опроса температуры, с
+            pressure_deadband (float): Зона нечувствительности давления
+            temperature_deadband (float): Зона нечувствительности температуры
+            min_factor (float): Нижняя граница интервала в долях базового
+            max_factor (float): Верхняя граница интервала в долях базового
+            heartbeat (float): Наибольшая пауза между передачами, None - без нее
+            sink (callable): sink(name, value, timestamp), по умолчанию печать
+            max_failures (int): Число ошибок подряд до повторного определения MAC
+        """
+        if sink is None:
+            def sink(name, value, timestamp):
+                print(f"[{time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(timestamp))}] "
+                      f"{name}: {value}")
+        
+        sample = PTMRSSample()
+        
+        def read_pressure():
+            return sample.pressure if self.read_sample(False, sample) else None
+        
+        channels = (
+            AdaptiveChannel('pressure', read_pressure, pressure_interval,
+                            pressure_deadband, min_factor, max_factor, heartbeat),
+            AdaptiveChannel('temperature', self.read_temperature, temperature_interval,
+                            temperature_deadband, min_factor, max_factor, heartbeat),
+        )
+        
+        print("Начинаем адаптивное чтение данных. Нажмите Ctrl+C для остановки.")
+        failures = 0
+        try:
+            while True:
+                channel = min(channels, key=lambda c: c.next_due)
+                wait = channel.next_due - time.monotonic()
+                if wait > 0:
+                    time.sleep(wait)
+                
+                value = channel.read()
+                now = time.monotonic()
+                if value is None:
+                    channel.next_due = now + channel.interval
+                    failures += 1
+                    if failures >= max_failures:
+                        print("Датчик не отвечает, повторное определение MAC адреса")
+                        self.rediscover()
+                        failures = 0
+                    continue
+                
+                failures = 0
+                if channel.update(value, now):
+                    sink(channel.name, value, time.time())
+                
+        except KeyboardInterrupt:
+            print("\nОстановка чтения данных")
+
+
+class AdaptiveChannel:
+    """Расписание и зона нечувствительности одной измеряемой величины"""
+
+    __slots__ = ('name', 'read', 'interval', 'min_interval', 'max_interval',
+                 'deadband', 'heartbeat', 'next_due', 'last_value',
+                 'last_emitted', 'last_emit_time')
+
+    SHRINK = 0.5
+    GROWTH = 1.25
+
+    def __init__(self, name, read, interval, deadband, min_factor=0.1,
+                 max_factor=4.0, heartbeat=None):
+        """
+        Args:
+            name (str): Имя величины для sink
+            read (callable): Функция чтения, возвращает значение или None
+            interval (float): Базовый интервал опроса, с
+            deadband (float): Зона нечувствительности
+            min_factor (float): Нижняя граница интервала в долях базового
+            max_factor (float): Верхняя граница интервала в долях базового
+            heartbeat (float): Наибольшая пауза между передачами, с
+        """
+        self.name = name
+        self.read = read
+        self.interval = interval
+        self.min_interval = interval * min_factor
+        self.max_interval = interval * max_factor
+        self.deadband = deadband
+        self.heartbeat = heartbeat
+        self.next_due = 0.0
+        self.last_value = None
+        self.last_emitted = None
+        self.last_emit_time = None
+
+    def update(self, value, now):
+        """
+        Учет нового значения и подстройка интервала
+
+        Returns:
+            bool: True, если значение нужно передать в sink
+        """
+        if self.last_value is not None and abs(value - self.last_value) > self.deadband:
+            self.interval = max(self.min_interval, self.interval * self.SHRINK)
+        else:
+            self.interval = min(self.max_interval, self.interval * self.GROWTH)
+        self.last_value = value
+        self.next_due = now + self.interval
+
+        emit = (self.last_emitted is None
+                or abs(value - self.last_emitted) > self.deadband
+                or (self.heartbeat is not None
+                    and now - self.last_emit_time >= self.heartbeat))
+        if emit:
+            self.last_emitted = value
+            self.last_emit_time = now
+        return emit
+
+
+class BusDevice:
+    """Состояние одного датчика на общей шине RS-485"""
+
+    def __init__(self, mac_address, priority=0, period=0.0):
+        """
+        Args:
+            mac_address (str): MAC адрес датчика (12 hex символов)
+            priority (int): Приоритет опроса, меньше - важнее
+            period (float): Минимальный интервал между опросами в секундах
+        """
+        self.mac_address = mac_address
+        self.priority = priority
+        self.period = period
+        self.next_due = 0.0
+        self.last_poll = None
+        self.cycle_time = None
+        self.rtt = None
+        self.polls = 0
+        self.errors = 0
+        self.last_reading = None
+
+
+class PTMRSBus:
+    """
+    Опрос нескольких датчиков PTM-RS на одной линии RS-485.
+
+    Держит один serial.Serial и список MAC адресов. Давление запрашивается
+    отправкой MAC адреса, поэтому каждый запрос адресован одному датчику.
+    Ответ читается до терминатора ';' или '\\n' без фиксированных пауз.
+    """
+
+    ROUND_ROBIN = 'round_robin'
+    PRIORITY = 'priority'
+
+    def __init__(self, port='COM9', baudrate=9600, timeout=0.5, mode=ROUND_ROBIN):
+        """
+        Args:
+            port (str): COM-порт общей линии
+            baudrate (int): Скорость передачи данных
+            timeout (float): Таймаут ожидания ответа одного датчика в секундах
+            mode (str): PTMRSBus.ROUND_ROBIN или PTMRSBus.PRIORITY
+        """
+        if mode not in (self.ROUND_ROBIN, self.PRIORITY):
+            raise ValueError(f"Неизвестный режим опроса: {mode}")
+        self.port = port
+        self.baudrate = baudrate
+        self.timeout = timeout
+        self.mode = mode
+        self.connection = None
+        self.devices = []
+        self._next_index = 0
+        self._rx_buffer = bytearray()
+
+    def connect(self):
+        """Установка соединения с линией"""
+        try:
+            self.connection = serial.Serial(
+                port=self.port,
+                baudrate=self.baudrate,
+                bytesize=serial.EIGHTBITS,
+                parity=serial.PARITY_NONE,
+                stopbits=serial.STOPBITS_ONE,
+                timeout=self.timeout,
+                inter_byte_timeout=0.05
+            )
+            print(f"Подключено к {self.port} со скоростью {self.baudrate} бод")
+            return True
+
+        except serial.SerialException as e:
+            print(f"Ошибка подключения: {e}")
+            return False
+
+    def disconnect(self):
+        """Закрытие соединения"""
+        if self.connection and self.connection.is_open:
+            self.connection.close()
+            print("Соединение закрыто")
+
+    def add_device(self, mac_address, priority=0, period=0.0):
+        """
+        Добавление датчика в список опроса
+
+        Args:
+            mac_address (str): MAC адрес датчика
+            priority (int): Приоритет опроса (для режима PRIORITY)
+            period (float): Минимальный интервал между опросами датчика.
+                В режиме PRIORITY должен быть больше нуля, иначе датчик
+                с высшим приоритетом всегда готов к опросу и остальные
+                никогда не опрашиваются
+        """
+        if self.mode == self.PRIORITY and period <= 0:
+            raise ValueError("В режиме PRIORITY период опроса датчика должен быть больше нуля")
+        device = BusDevice(mac_address.upper(), priority, period)
+        self.devices.append(device)
+        return device
+
+    def remove_device(self, mac_address):
+        """Удаление датчика из списка опроса"""
+        mac_address = mac_address.upper()
+        self.devices = [d for d in self.devices if d.mac_address != mac_address]
+        self._next_index = 0
+
+    def discover(self, priority=0, period=0.0):
+        """
+        Запрос MAC адреса командой :takemacadr;
+
+        На линии должен быть подключен только один датчик, иначе ответы
+        наложатся. Найденный адрес добавляется в список опроса с указанными
+        priority и period (см. add_device).
+        """
+        response = self.transaction(":takemacadr;")
+        if response:
+            mac_match = re.search(r'[A-Fa-f0-9]{12}', response)
+            if mac_match:
+                mac_address = mac_match.group(0).upper()
+                if all(d.mac_address != mac_address for d in self.devices):
+                    self.add_device(mac_address, priority, period)
+                return mac_address
+        print(f"Неожиданный ответ на запрос MAC адреса: {response}")
+        return None
+
+    def transaction(self, command):
+        """
+        Отправка команды и чтение ответа до терминатора
+
+        Returns:
+            str: Ответ без терминатора или None при таймауте
+        """
+        if self._exchange(command):
+            return self._rx_buffer.decode('ascii', errors='ignore').strip()
+        return None
+
+    def _exchange(self, command):
+        """Отправка команды, ответ остается в self._rx_buffer"""
+        if not self.connection or not self.connection.is_open:
+            print("Соединение не установлено")
+            return False
+
+        try:
+            self.connection.reset_input_buffer()
+            self.connection.write(command.encode('ascii'))
+            return read_frame(self.connection, self._rx_buffer, self.timeout)
+        except (serial.SerialException, OSError) as e:
+            # Ошибка засчитывается датчику, опрос остальных продолжается
+            print(f"Ошибка обмена с {command}: {e}")
+            return None
+
+    def _next_device(self, now):
+        """Выбор следующего датчика, у которого подошло время опроса"""
+        count = len(self.devices)
+        if self.mode == self.PRIORITY:
+            due = [d for d in self.devices if d.next_due <= now]
+            if not due:
+                return None
+            return min(due, key=lambda d: (d.priority, d.next_due))
+
+        for offset in range(count):
+            index = (self._next_index + offset) % count
+            device = self.devices[index]
+            if device.next_due <= now:
+                self._next_index = (index + 1) % count
+                return device
+        return None
+
+    def poll_device(self, device):
+        """
+        Запрос давления у одного датчика
+
+        Время ответа и период опроса сохраняются в device.rtt и device.cycle_time.
+
+        Returns:
+            PTMRSSample: Давление и код состояния или None при ошибке
+        """
+        start = time.monotonic()
+        complete = self._exchange(device.mac_address)
+        end = time.monotonic()
+
+        if device.last_poll is not None:
+            device.cycle_time = start - device.last_poll
+        device.last_poll = start
+        device.next_due = start + device.period
+        device.polls += 1
+
+        sample = parse_pressure(self._rx_buffer) if complete else None
+        if sample is None:
+            device.errors += 1
+            return None
+
+        device.rtt = end - start
+        device.last_reading = sample
+        return sample
+
+    def poll_once(self):
+        """
+        Опрос следующего по расписанию датчика
+
+        Returns:
+            tuple: (BusDevice, PTMRSSample или None) или None, если опрашивать некого
+        """
+        device = self._next_device(time.monotonic())
+        if device is None:
+            return None
+        return device, self.poll_device(device)
+
+    def run(self, callback=None):
+        """
+        Непрерывный опрос всех датчиков линии
+
+        Args:
+            callback (callable): Вызывается как callback(device, reading)
+                для каждого запроса, reading равен None при ошибке
+        """
+        if not self.devices:
+            print("Список датчиков пуст")
+            return
+
+        try:
+            while True:
+                result = self.poll_once()
+                if result is None:
+                    # Ни у одного датчика не подошло время опроса
+                    wait = min(d.next_due for d in self.devices) - time.monotonic()
+                    if wait > 0:
+                        time.sleep(wait)
+                    continue
+
+                device, reading = result
+                if callback:
+                    callback(device, reading)
+                elif reading:
+                    print(f"{device.mac_address}: {reading.pressure} "
+                          f"(rtt {device.rtt * 1000:.1f} мс)")
+                else:
+                    print(f"{device.mac_address}: нет ответа")
+
+        except KeyboardInterrupt:
+            print("\nОстановка опроса линии")
+
 
 def main():
     # Настройки подключения
@@ -289,7 +988,7 @@ def main():
     BAUDRATE = 9600
     
     # Создаем экземпляр ридера
-    reader = PTMRSReader(port=PORT, baudrate=BAUDRATE)
+    reader = PTMRSReader(port=PORT, baudrate=BAUDRATE, framed=True, cache=DiscoveryCache())
     
     # Подключаемся к датчику
     if not reader.connect():
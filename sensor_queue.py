@@ -0,0 +1,111 @@
+import threading
+from collections import deque
+from queue import Empty
+
+
+class SensorQueue:
+    """
+    Bounded queue of (timestamp, {sensor name: value}) items.
+
+    Overflow policies:
+        block       - put() waits for room (up to its timeout), then drops
+        drop_oldest - the oldest queued item is discarded to make room
+        latest      - items are merged so only the newest value of each
+                      sensor is kept; get_nowait() returns them all at once
+                      with the oldest enqueue time among them
+
+    dropped counts items lost to the size bound; under the latest policy
+    values replaced by a newer one of the same sensor are counted separately
+    in superseded, since that is normal coalescing rather than overflow.
+
+    Exposes get_nowait()/empty()/qsize() like queue.Queue, plus stats().
+    """
+
+    BLOCK = 'block'
+    DROP_OLDEST = 'drop_oldest'
+    LATEST = 'latest'
+    POLICIES = (BLOCK, DROP_OLDEST, LATEST)
+
+    def __init__(self, maxsize=1000, policy=LATEST):
+        if policy not in self.POLICIES:
+            raise ValueError(f"Unknown queue policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items = deque()
+        self.latest = {}  # name -> (timestamp, value), used by the latest policy
+        self.cond = threading.Condition()
+        self.high_water = 0
+        self.dropped = 0
+        self.superseded = 0
+
+    def _depth(self):
+        return len(self.latest) if self.policy == self.LATEST else len(self.items)
+
+    def put(self, item, timeout=None):
+        """
+        :param item: (timestamp, {sensor name: value})
+        :param timeout: Longest wait for room under the block policy, None waits forever
+        :return: False if the item was dropped
+        """
+        with self.cond:
+            if self.policy == self.LATEST:
+                timestamp, sensor_data = item
+                latest = self.latest
+                for name, value in sensor_data.items():
+                    if name in latest:
+                        # Superseded before it was shown; keep the older enqueue time and
+                        # re-insert so dict order stays least recently updated first
+                        self.superseded += 1
+                        latest[name] = (latest.pop(name)[0], value)
+                    else:
+                        if len(latest) >= self.maxsize:
+                            del latest[next(iter(latest))]
+                            self.dropped += 1
+                        latest[name] = (timestamp, value)
+            else:
+                if len(self.items) >= self.maxsize:
+                    if self.policy == self.BLOCK:
+                        self.cond.wait_for(lambda: len(self.items) < self.maxsize, timeout)
+                        if len(self.items) >= self.maxsize:
+                            self.dropped += 1
+                            return False
+                    else:
+                        self.items.popleft()
+                        self.dropped += 1
+                self.items.append(item)
+
+            depth = self._depth()
+            if depth > self.high_water:
+                self.high_water = depth
+            return True
+
+    def get_nowait(self):
+        with self.cond:
+            if self.policy == self.LATEST:
+                if not self.latest:
+                    raise Empty
+                timestamp = min(entry[0] for entry in self.latest.values())
+                sensor_data = {name: entry[1] for name, entry in self.latest.items()}
+                self.latest.clear()
+                return timestamp, sensor_data
+            if not self.items:
+                raise Empty
+            item = self.items.popleft()
+            self.cond.notify()
+            return item
+
+    def empty(self):
+        return self._depth() == 0
+
+    def qsize(self):
+        return self._depth()
+
+    def stats(self):
+        return {
+            'policy': self.policy,
+            'maxsize': self.maxsize,
+            'depth': self._depth(),
+            'high_water': self.high_water,
+            'dropped': self.dropped,
+            'superseded': self.superseded,
+        }
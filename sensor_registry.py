@@ -0,0 +1,66 @@
+import json
+import os
+
+DEFAULT_CONFIG = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'sensors.json')
+
+
+class SensorSpec:
+    """One configured sensor: where it is shown and how its raw value is scaled"""
+
+    __slots__ = ('name', 'sensor_id', 'label', 'units', 'scale', 'offset', 'slot', 'trend')
+
+    def __init__(self, name, sensor_id=None, label=None, units='', scale=1.0, offset=0.0,
+                 slot=None, trend=False):
+        """
+        :param name: Key used in sensor_data_queue items and on screen
+        :param sensor_id: Controller sensor_id, None for sensors not fed from serial
+        :param label: Short caption, defaults to the first letter of name
+        :param units: Units shown next to the caption
+        :param scale, offset: Displayed value is raw * scale + offset
+        :param slot: Display position, defaults to the order in the config file
+        :param trend: Keep history and draw a trend plot for this sensor
+        """
+        self.name = name
+        self.sensor_id = sensor_id
+        self.label = label if label is not None else name[:1].upper()
+        self.units = units
+        self.scale = scale
+        self.offset = offset
+        self.slot = slot
+        self.trend = trend
+
+    def convert(self, raw):
+        if self.scale == 1.0 and self.offset == 0.0:
+            return raw  # Keep the controller's formatting for unscaled values
+        return raw * self.scale + self.offset
+
+
+class SensorRegistry:
+    """Sensor table with O(1) lookup by controller sensor_id"""
+
+    def __init__(self, specs):
+        for position, spec in enumerate(specs):
+            if spec.slot is None:
+                spec.slot = position
+        self.specs = sorted(specs, key=lambda spec: spec.slot)
+        self.by_name = {spec.name: spec for spec in self.specs}
+        self.by_id = {spec.sensor_id: spec for spec in self.specs if spec.sensor_id is not None}
+
+    def __len__(self):
+        return len(self.specs)
+
+    def __iter__(self):
+        return iter(self.specs)
+
+    def lookup(self, sensor_id):
+        return self.by_id.get(sensor_id)
+
+    @classmethod
+    def load(cls, path=DEFAULT_CONFIG):
+        """
+        Load a JSON config of the form
+        {"sensors": [{"name": "velocity", "sensor_id": 1, "units": "m/s", ...}, ...]}
+        """
+        with open(path, 'r', encoding='utf-8') as f:
+            config = json.load(f)
+        return cls([SensorSpec(**entry) for entry in config['sensors']])
@@ -4,15 +4,36 @@ from base_sensor import Sensor
 import tpr, yf_s201
 
 from machine import I2C, Pin
-from ads1115 import ADS1115
+from array import array
+from ads1115 import ADS1115, ADS1115Scan, ADS1115Window
+from adc_filters import FilterChain, Median, DecimatingAverage, IIRLowPass
 
 class PressureSensor(Sensor):
 
-    def __init__(self, name):
+    def __init__(self, name, alert_pin=None, window=None, oversample=1):
         super().__init__(name)
         # Инициализируем необходимые ресурсы
         self.i2c = I2C(0, sda=Pin(21), scl=Pin(22))
         self.adc = ADS1115(self.i2c, address=0x48, gain=1)
+        # Три канала на 860 SPS, следующее преобразование запускается сразу после чтения
+        self.scan = ADS1115Scan(self.adc, [(channel, 7, 1) for channel in range(3)])
+        # oversample (кратно 3, например 15) проходов за опрос: медиана по 3,
+        # среднее по остальным и НЧ-фильтр, наверх уходит одно значение на канал.
+        # Проход по трём каналам занимает ~4 мс, между проходами управление
+        # отдаётся другим задачам, так что 15 проходов укладываются в PERIOD
+        if oversample != 1 and (oversample < 3 or oversample % 3):
+            raise ValueError("oversample must be 1 or a multiple of 3")
+        self.oversample = oversample
+        if oversample > 1:
+            self.block = array('h', [0] * (3 * oversample))
+            self.filters = [FilterChain(Median(3), DecimatingAverage(oversample // 3), IIRLowPass(2))
+                            for _ in range(3)]
+        self.watch = None
+        if alert_pin is not None and window is not None:
+            # Вместо постоянного опроса ждём выхода давления из окна (low, high) в вольтах
+            self.watch = ADS1115Window(self.adc, Pin(alert_pin, Pin.IN, Pin.PULL_UP))
+            for channel in range(3):
+                self.watch.set_window(channel, *window)
 
     class SENSOR_IDS:
         # Объявляем ID датчиков
@@ -20,14 +41,30 @@ class PressureSensor(Sensor):
         PRESSURE_PP2 = 2
         PRESSURE_PP3 = 3       
 
+    CHANNEL_IDS = (SENSOR_IDS.PRESSURE_PP1, SENSOR_IDS.PRESSURE_PP2, SENSOR_IDS.PRESSURE_PP3)
+
     PERIOD = 1 / 10  # Период опроса, 10 раз в секунду
 
     async def sense(self):
+        if self.watch is not None:
+            # Результат появляется только при выходе давления из окна и возврате в него
+            if not self.watch.running:
+                asyncio.create_task(self.watch.run())
+            channel, raw, ticks, kind = await self.watch.next_event()
+            self.SENSE_RESULTS[self.CHANNEL_IDS[channel]] = self.adc.raw_to_v(raw)
+            return
+        if self.oversample > 1:
+            for n in range(self.oversample):
+                self.scan.scan_into(self.block, 1, 3 * n)
+                await asyncio.sleep_ms(0)  # Не задерживаем FlowSensor и остальные задачи
+            for channel, sensor_id in enumerate(self.CHANNEL_IDS):
+                if self.filters[channel].process(self.block, self.oversample, channel, 3):
+                    self.SENSE_RESULTS[sensor_id] = self.scan.voltage(channel, self.block[channel])
+            return
         # Чтение данных с каждого датчика давления и сохранение результатов
-        for channel, sensor_id in enumerate([self.SENSOR_IDS.PRESSURE_PP1, self.SENSOR_IDS.PRESSURE_PP2, self.SENSOR_IDS.PRESSURE_PP3]):
-            raw = self.adc.read(7, channel)
-            voltage = self.adc.raw_to_v(raw)
-            self.SENSE_RESULTS[sensor_id] = voltage
+        self.scan.scan()
+        for channel, sensor_id in enumerate(self.CHANNEL_IDS):
+            self.SENSE_RESULTS[sensor_id] = self.scan.voltage(channel)
 
 
 
@@ -0,0 +1,171 @@
+import json
+import time
+
+from telemetry_frame import FrameDecoder, FORMAT_NAME, hello_request
+
+
+class SerialIngest:
+    """
+    Bulk reader for the controller's newline-delimited JSON stream.
+
+    Each poll reads everything waiting on the port in one call, splits
+    complete lines out of a persistent bytearray and hands them to the
+    callback as one parsed batch. A trailing partial line stays in the
+    buffer until the rest of it arrives.
+
+    request_binary() offers the telemetry_frame binary format to the
+    controller. When it answers {"type": "hello", "format": "bin1"} the
+    rest of the stream is decoded as binary frames; JSON lines sent between
+    frames (command replies) still go through the JSON path. Without an
+    answer the JSON path stays in use. The hello reply is not recorded and
+    is ignored when there is no port (replay), since recordings are always
+    line-based.
+    """
+
+    def __init__(self, ser, on_batch, verbose=False, max_line=4096, recorder=None):
+        """
+        :param ser: Open serial.Serial, or None when fed through feed() only
+        :param on_batch: Called as on_batch(messages) with a list of parsed dicts
+        :param verbose: Print every received line
+        :param max_line: Longest accepted line in bytes; longer input is dropped
+        :param recorder: Optional SessionRecorder that gets every raw line
+        """
+        self.ser = ser
+        self.on_batch = on_batch
+        self.verbose = verbose
+        self.max_line = max_line
+        self.recorder = recorder
+        self.running = False
+        self.buffer = bytearray()
+        self.decoder = None  # FrameDecoder once binary framing is negotiated
+
+        self.messages = 0
+        self.malformed = 0
+        self.dropped = 0
+        self._rate_messages = 0
+        self._rate_time = time.monotonic()
+
+    def run(self):
+        """Read until stop() is called, meant to be a thread target"""
+        self.running = True
+        while self.running:
+            self.poll()
+
+    def stop(self):
+        self.running = False
+
+    def poll(self):
+        """Block for at least one byte, then take the rest of the input buffer"""
+        chunk = self.ser.read(self.ser.in_waiting or 1)
+        if chunk:
+            self.feed(chunk)
+
+    def request_binary(self):
+        """Offer binary framing to the controller, call before run()"""
+        self.ser.write(json.dumps(hello_request()).encode() + b'\n')
+
+    def _parse_line(self, raw_line, received):
+        """Record and parse one JSON line, None if it is blank or malformed"""
+        line = raw_line.strip()
+        if not line:
+            return None
+        if self.verbose:
+            print(f"Received: {line.decode(errors='replace')}")
+        message = None
+        if len(line) <= self.max_line:
+            try:
+                message = json.loads(line)
+            except ValueError:
+                pass
+        is_dict = isinstance(message, dict)
+        if self.recorder and not (is_dict and self._is_hello(message)):
+            self.recorder.record(line, received)
+        if len(line) > self.max_line:
+            self.dropped += 1
+            return None
+        if not is_dict:
+            self.malformed += 1
+            return None
+        return message
+
+    def _is_hello(self, message):
+        return message.get('type') == 'hello' and message.get('format') == FORMAT_NAME
+
+    def _feed_binary(self, chunk):
+        lines = []
+        batch = self.decoder.feed(chunk, lines)
+        received = time.monotonic()
+        if batch and self.recorder:
+            # Recordings stay line-based so replay works for either format
+            for message in batch:
+                self.recorder.record(json.dumps(message).encode(), received)
+        for line in lines:
+            message = self._parse_line(line, received)
+            if message is not None and not self._is_hello(message):
+                batch.append(message)
+        if batch:
+            self.messages += len(batch)
+            self.on_batch(batch)
+
+    def feed(self, chunk):
+        """Append raw bytes and parse every complete line"""
+        if self.decoder is not None:
+            self._feed_binary(chunk)
+            return
+
+        buffer = self.buffer
+        buffer += chunk
+        end = buffer.rfind(b'\n')
+        if end < 0:
+            if len(buffer) > self.max_line:
+                # No line break in sight: noise or a wrong baud rate
+                self.dropped += 1
+                buffer.clear()
+            return
+
+        lines = buffer[:end].split(b'\n')
+        del buffer[:end + 1]
+
+        received = time.monotonic()
+        batch = []
+        switched_at = None
+        for index, raw_line in enumerate(lines):
+            message = self._parse_line(raw_line, received)
+            if message is None:
+                continue
+            if self._is_hello(message):
+                if self.ser is not None:
+                    switched_at = index
+                    break
+                continue  # Replay: the recording after a hello is still line-based
+            batch.append(message)
+
+        if batch:
+            self.messages += len(batch)
+            self.on_batch(batch)
+
+        if switched_at is not None:
+            # Everything after the hello reply is binary, including what was split as lines
+            rest = lines[switched_at + 1:]
+            tail = b'\n'.join(rest) + b'\n' + buffer if rest else bytes(buffer)
+            buffer.clear()
+            self.decoder = FrameDecoder()
+            self._feed_binary(tail)
+
+    def stats(self):
+        """Counters plus the message rate since the previous call"""
+        now = time.monotonic()
+        elapsed = now - self._rate_time
+        rate = (self.messages - self._rate_messages) / elapsed if elapsed > 0 else 0.0
+        self._rate_messages = self.messages
+        self._rate_time = now
+        stats = {
+            'format': FORMAT_NAME if self.decoder is not None else 'json',
+            'messages': self.messages,
+            'messages_per_sec': rate,
+            'malformed': self.malformed,
+            'dropped': self.dropped,
+        }
+        if self.decoder is not None:
+            stats['malformed'] += self.decoder.crc_errors + self.decoder.missing_reference
+        return stats
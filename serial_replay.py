@@ -0,0 +1,113 @@
+import struct
+import time
+
+MAGIC = b'SREC1\n'
+_RECORD = struct.Struct('<IH')  # Microseconds since the previous line, line length
+_MAX_DELTA_US = 0xFFFFFFFF
+
+
+class SessionRecorder:
+    """
+    Writes the raw serial line stream to a compact file.
+
+    Each line is stored as a 6-byte header (time since the previous line in
+    microseconds from a monotonic clock, line length) followed by the line
+    bytes without the newline.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'wb')
+        self.file.write(MAGIC)
+        self.lines = 0
+        self._last = time.monotonic()
+
+    def record(self, line, timestamp=None):
+        """Append one line received at timestamp (time.monotonic())"""
+        if timestamp is None:
+            timestamp = time.monotonic()
+        delta = int((timestamp - self._last) * 1e6)
+        self._last = timestamp
+        line = line[:0xFFFF]
+        self.file.write(_RECORD.pack(min(max(delta, 0), _MAX_DELTA_US), len(line)))
+        self.file.write(line)
+        self.lines += 1
+
+    def close(self):
+        self.file.close()
+
+
+def read_session(path):
+    """Yield (seconds since the first line, line bytes) from a recorded file"""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError(f"{path} is not a serial session recording")
+        elapsed = 0
+        first = True
+        while True:
+            header = f.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                return
+            delta, length = _RECORD.unpack(header)
+            line = f.read(length)
+            if len(line) < length:
+                return
+            if first:
+                first = False  # The first delta is the gap since recording started
+            else:
+                elapsed += delta
+            yield elapsed / 1e6, line
+
+
+class ReplaySource:
+    """
+    Plays a recording back into a SerialIngest-style feed(chunk) callback.
+
+    speed=1 keeps the recorded timing, speed=N runs N times faster and
+    speed=0 pushes lines as fast as the consumer takes them.
+    """
+
+    CHUNK_SIZE = 4096  # Bytes handed to feed() at once when running flat out
+
+    def __init__(self, path, feed, speed=1.0, loop=False):
+        self.path = path
+        self.feed = feed
+        self.speed = speed
+        self.loop = loop
+        self.running = False
+        self.lines = 0
+
+    def stop(self):
+        self.running = False
+
+    def run(self):
+        self.running = True
+        while self.running:
+            self._play_once()
+            if not self.loop:
+                break
+        self.running = False
+
+    def _play_once(self):
+        chunk = bytearray()
+        start = time.monotonic()
+        for offset, line in read_session(self.path):
+            if not self.running:
+                break
+            if self.speed > 0:
+                due = start + offset / self.speed
+                wait = due - time.monotonic()
+                if wait > 0:
+                    # Flush what is already due before sleeping
+                    if chunk:
+                        self.feed(bytes(chunk))
+                        chunk.clear()
+                    time.sleep(wait)
+            chunk += line
+            chunk += b'\n'
+            self.lines += 1
+            if len(chunk) >= self.CHUNK_SIZE:
+                self.feed(bytes(chunk))
+                chunk.clear()
+        if chunk:
+            self.feed(bytes(chunk))
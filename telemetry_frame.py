@@ -0,0 +1,231 @@
+"""
+Compact binary telemetry frames between the stand controller and the host.
+
+Frame:
+    0      2  sync bytes 0xA5 0x5A
+    2      2  payload length, little-endian
+    4      n  payload
+    4+n    2  CRC-16/MODBUS of length and payload, little-endian
+
+Payload:
+    0      1  version (1)
+    1      1  record count
+    2      1  frame sequence number, wraps at 256
+    3      4  base timestamp, ms (controller ticks)
+    7..       records, little-endian:
+        full   u16 sensor_id,          u16 dt_ms, f32 value   (8 bytes)
+        delta  u16 sensor_id | 0x8000, u16 dt_ms, i16 delta   (6 bytes)
+               value = previous value of the sensor + delta * delta_scale
+
+The encoder tracks the value the decoder will reconstruct, so delta
+records do not accumulate rounding error. Every keyframe_interval records
+of a sensor, and whenever the change does not fit an i16 or is not
+finite (NaN/inf from an open-circuit sensor), a full record is sent.
+After a sequence gap, a CRC error or skipped bytes the decoder forgets
+its references, so deltas are counted as missing_reference instead of
+being applied to a stale value until the sensor's next keyframe.
+
+Newline-terminated JSON lines (command replies) may be sent between
+frames; FrameDecoder.feed() hands them back separately.
+
+Both classes avoid host-only modules so the encoder runs on MicroPython.
+"""
+import struct
+
+from crc16 import crc16
+
+SYNC = b'\xa5\x5a'
+VERSION = 1
+FORMAT_NAME = 'bin1'
+MAX_PAYLOAD = 2048
+MAX_RECORDS = 255
+MAX_LINE = 4096
+_HEADER = 7
+_DELTA_FLAG = 0x8000
+
+
+class FrameEncoder:
+    def __init__(self, delta_scale=0.001, keyframe_interval=50, use_delta=True):
+        """
+        :param delta_scale: Value step of one delta unit, i.e. delta resolution
+        :param keyframe_interval: Records of a sensor between forced full records
+        :param use_delta: False sends every record in full
+        """
+        self.delta_scale = delta_scale
+        self.keyframe_interval = keyframe_interval
+        self.use_delta = use_delta
+        self.reference = {}  # sensor_id -> value as reconstructed by the decoder
+        self.since_key = {}
+        self.sequence = 0
+        self.buffer = bytearray(4 + _HEADER + 8 * MAX_RECORDS + 2)
+
+    def encode(self, readings, base_ms=None):
+        """
+        :param readings: Sequence of (sensor_id, t_ms, value), at most 255
+        :param base_ms: Frame base time, defaults to the first reading's time
+        :return: memoryview of the encoded frame, valid until the next call
+        """
+        count = len(readings)
+        if count > MAX_RECORDS:
+            raise ValueError("too many readings for one frame")
+        if base_ms is None:
+            base_ms = readings[0][1] if count else 0
+
+        buf = self.buffer
+        scale = self.delta_scale
+        pos = 4 + _HEADER
+        for sensor_id, t_ms, value in readings:
+            dt = (t_ms - base_ms) & 0xFFFF
+            ref = self.reference.get(sensor_id)
+            since = self.since_key.get(sensor_id, 0)
+            if self.use_delta and ref is not None and since < self.keyframe_interval:
+                step = (value - ref) / scale
+                if -32768 <= step <= 32767:  # False for NaN and inf
+                    delta = int(round(step))
+                    struct.pack_into('<HHh', buf, pos, sensor_id | _DELTA_FLAG, dt, delta)
+                    pos += 6
+                    self.reference[sensor_id] = ref + delta * scale
+                    self.since_key[sensor_id] = since + 1
+                    continue
+            struct.pack_into('<HHf', buf, pos, sensor_id, dt, value)
+            pos += 8
+            # Reconstruct through f32 exactly like the decoder does
+            self.reference[sensor_id] = struct.unpack_from('<f', buf, pos - 4)[0]
+            self.since_key[sensor_id] = 0
+
+        length = pos - 4
+        struct.pack_into('<2sHBBBI', buf, 0, SYNC, length, VERSION, count,
+                         self.sequence, base_ms & 0xFFFFFFFF)
+        self.sequence = (self.sequence + 1) & 0xFF
+        crc = crc16(memoryview(buf)[2:pos])
+        struct.pack_into('<H', buf, pos, crc)
+        return memoryview(buf)[:pos + 2]
+
+
+class FrameDecoder:
+    def __init__(self, delta_scale=0.001):
+        self.delta_scale = delta_scale
+        self.reference = {}
+        self.buffer = bytearray()
+        self.sequence = None  # Expected sequence number of the next frame
+        self.frames = 0
+        self.crc_errors = 0
+        self.skipped_bytes = 0
+        self.lost_frames = 0
+        self.missing_reference = 0
+
+    def _skip(self, count):
+        if count:
+            self.skipped_bytes += count
+            self.reference.clear()
+            self.sequence = None
+
+    def feed(self, chunk, lines=None):
+        """
+        Append received bytes and decode every complete frame.
+
+        :param lines: Optional list that gets the JSON lines found between
+                      frames (bytes, without the newline); without it they
+                      are counted as skipped bytes
+        :return: List of {'sensor_id', 'value', 't_ms'} dicts, the same
+                 shape SerialIngest hands out for JSON messages
+        """
+        buf = self.buffer
+        buf += chunk
+        messages = []
+        start = 0
+        while True:
+            if start < len(buf) and buf[start] == 0x7B:  # '{' where a frame could start
+                end = buf.find(b'\n', start, start + MAX_LINE)
+                if end >= 0:
+                    if lines is not None:
+                        lines.append(bytes(buf[start:end]))
+                    else:
+                        self._skip(end + 1 - start)
+                    start = end + 1
+                    continue
+                if len(buf) - start < MAX_LINE:
+                    break  # Wait for the rest of the line
+            elif start < len(buf) and buf[start] in b'\r\n':
+                start += 1  # Line ending left by the JSON stream
+                continue
+            sync = buf.find(SYNC, start)
+            if sync < 0:
+                # Keep a trailing 0xA5 that may be the first sync byte
+                keep = 1 if buf[-1:] == SYNC[:1] else 0
+                self._skip(len(buf) - start - keep)
+                start = len(buf) - keep
+                break
+            self._skip(sync - start)
+            start = sync
+            if len(buf) - sync < 4:
+                break
+            length = buf[sync + 2] | buf[sync + 3] << 8
+            if length < _HEADER or length > MAX_PAYLOAD:
+                self._skip(1)
+                start = sync + 1  # False sync inside data, rescan
+                continue
+            end = sync + 4 + length + 2
+            if len(buf) < end:
+                start = sync
+                break
+            view = memoryview(buf)
+            crc = buf[end - 2] | buf[end - 1] << 8
+            if crc16(view[sync + 2:end - 2]) != crc:
+                view.release()
+                self.crc_errors += 1
+                self._skip(1)
+                start = sync + 1
+                continue
+            self._decode_payload(view[sync + 4:end - 2], messages)
+            view.release()
+            self.frames += 1
+            start = end
+        del buf[:start]
+        return messages
+
+    def _decode_payload(self, payload, messages):
+        version, count, sequence, base_ms = struct.unpack_from('<BBBI', payload, 0)
+        if version != VERSION:
+            return
+        if self.sequence is not None and sequence != self.sequence:
+            # Whole frames went missing, their deltas would have moved the references
+            self.lost_frames += (sequence - self.sequence) & 0xFF
+            self.reference.clear()
+        self.sequence = (sequence + 1) & 0xFF
+        scale = self.delta_scale
+        reference = self.reference
+        pos = _HEADER
+        size = len(payload)
+        for _ in range(count):
+            if pos + 6 > size:
+                return
+            raw_id, dt = struct.unpack_from('<HH', payload, pos)
+            if raw_id & _DELTA_FLAG:
+                sensor_id = raw_id & ~_DELTA_FLAG
+                delta = struct.unpack_from('<h', payload, pos + 4)[0]
+                pos += 6
+                ref = reference.get(sensor_id)
+                if ref is None:
+                    self.missing_reference += 1  # Lost the keyframe, wait for the next one
+                    continue
+                value = ref + delta * scale
+            else:
+                if pos + 8 > size:
+                    return
+                sensor_id = raw_id
+                value = struct.unpack_from('<f', payload, pos + 4)[0]
+                pos += 8
+            reference[sensor_id] = value
+            messages.append({'sensor_id': sensor_id, 'value': value, 't_ms': (base_ms + dt) & 0xFFFFFFFF})
+
+
+def hello_request():
+    """JSON line the host sends at connect to offer the binary format"""
+    return {'type': 'hello', 'formats': [FORMAT_NAME, 'json']}
+
+
+def hello_reply(request):
+    """Controller side: pick the format for a hello request (JSON if unsupported)"""
+    formats = request.get('formats') or []
+    return {'type': 'hello', 'format': FORMAT_NAME if FORMAT_NAME in formats else 'json'}
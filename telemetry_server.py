@@ -0,0 +1,267 @@
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import struct
+import threading
+import time
+
+import serial
+
+from sensor_registry import SensorRegistry, DEFAULT_CONFIG
+from serial_ingest import SerialIngest
+from serial_replay import ReplaySource
+
+_WS_GUID = b'258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class ClientQueue:
+    """
+    Bounded per-client queue that keeps only the latest update of each sensor.
+
+    A slow client never holds back acquisition: a newer value replaces the
+    queued one for the same sensor, and when more than maxsize sensors are
+    waiting the oldest entry is dropped.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.pending = {}
+        self.event = asyncio.Event()
+        self.superseded = 0
+        self.dropped = 0
+
+    def put(self, key, update):
+        pending = self.pending
+        if key in pending:
+            del pending[key]  # Re-insert so dict order stays oldest-first
+            self.superseded += 1
+        elif len(pending) >= self.maxsize:
+            del pending[next(iter(pending))]
+            self.dropped += 1
+        pending[key] = update
+        self.event.set()
+
+    async def get_all(self):
+        await self.event.wait()
+        self.event.clear()
+        updates = list(self.pending.values())
+        self.pending.clear()
+        return updates
+
+
+class TelemetryServer:
+    """
+    Reads the stand's serial stream once and fans sensor updates out to
+    local TCP (newline-delimited JSON) and WebSocket subscribers.
+    """
+
+    def __init__(self, registry, host='127.0.0.1', tcp_port=8765, ws_port=8766, queue_size=1024):
+        self.registry = registry
+        self.host = host
+        self.tcp_port = tcp_port
+        self.ws_port = ws_port
+        self.queue_size = queue_size
+        self.clients = set()
+        self.handlers = set()  # Connection tasks, cancelled by run() on exit
+        self.published = 0
+        self.loop = None
+
+    def on_batch(self, messages):
+        """SerialIngest callback, runs in the reader thread"""
+        now = time.time()
+        updates = []
+        for message in messages:
+            sensor_id = message.get('sensor_id')
+            if not sensor_id:
+                continue
+            spec = self.registry.lookup(sensor_id)
+            value = message.get('value')
+            if spec is not None and isinstance(value, (int, float)):
+                value = spec.convert(value)
+            updates.append({
+                'sensor_id': sensor_id,
+                'name': spec.name if spec is not None else None,
+                'value': value,
+                't': now,
+            })
+        if updates:
+            self.loop.call_soon_threadsafe(self.publish, updates)
+
+    def publish(self, updates):
+        self.published += len(updates)
+        for queue in self.clients:
+            for update in updates:
+                queue.put(update['sensor_id'], update)
+
+    async def _serve_client(self, send, closed):
+        queue = ClientQueue(self.queue_size)
+        self.clients.add(queue)
+        try:
+            while not closed.done():
+                getter = asyncio.ensure_future(queue.get_all())
+                done, _ = await asyncio.wait({getter, closed}, return_when=asyncio.FIRST_COMPLETED)
+                if getter not in done:
+                    getter.cancel()
+                    break
+                await send(getter.result())
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            self.clients.discard(queue)
+
+    async def handle_tcp(self, reader, writer):
+        async def send(updates):
+            writer.write(b''.join(json.dumps(update).encode() + b'\n' for update in updates))
+            await writer.drain()
+
+        closed = asyncio.ensure_future(self._tcp_wait_close(reader))
+        try:
+            await self._serve_client(send, closed)
+        finally:
+            closed.cancel()
+            writer.close()
+
+    async def handle_ws(self, reader, writer):
+        try:
+            request = await reader.readuntil(b'\r\n\r\n')
+        except (asyncio.IncompleteReadError, asyncio.LimitOverrunError):
+            writer.close()
+            return
+        key = None
+        for line in request.split(b'\r\n'):
+            name, _, value = line.partition(b':')
+            if name.strip().lower() == b'sec-websocket-key':
+                key = value.strip()
+        if key is None:
+            writer.write(b'HTTP/1.1 400 Bad Request\r\n\r\n')
+            writer.close()
+            return
+
+        accept = base64.b64encode(hashlib.sha1(key + _WS_GUID).digest())
+        writer.write(b'HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\n'
+                     b'Connection: Upgrade\r\nSec-WebSocket-Accept: ' + accept + b'\r\n\r\n')
+
+        async def send(updates):
+            payload = json.dumps(updates).encode()
+            if len(payload) < 126:
+                header = struct.pack('!BB', 0x81, len(payload))
+            elif len(payload) < 65536:
+                header = struct.pack('!BBH', 0x81, 126, len(payload))
+            else:
+                header = struct.pack('!BBQ', 0x81, 127, len(payload))
+            writer.write(header + payload)
+            await writer.drain()
+
+        closed = asyncio.ensure_future(self._ws_wait_close(reader))
+        try:
+            await self._serve_client(send, closed)
+        finally:
+            closed.cancel()
+            writer.close()
+
+    @staticmethod
+    async def _tcp_wait_close(reader):
+        """Discard client input in small chunks until EOF"""
+        try:
+            while await reader.read(4096):
+                pass
+        except ConnectionError:
+            return
+
+    @staticmethod
+    async def _ws_wait_close(reader):
+        """Consume client frames until a close frame or EOF"""
+        try:
+            while True:
+                head = await reader.readexactly(2)
+                length = head[1] & 0x7F
+                if length == 126:
+                    length = struct.unpack('!H', await reader.readexactly(2))[0]
+                elif length == 127:
+                    length = struct.unpack('!Q', await reader.readexactly(8))[0]
+                if head[1] & 0x80:
+                    length += 4  # Masking key
+                await reader.readexactly(length)
+                if head[0] & 0x0F == 0x8:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError):
+            return
+
+    async def _handle(self, handler, reader, writer):
+        """Connection callback that run() can cancel without asyncio
+           logging the CancelledError of the callback task"""
+        task = asyncio.current_task()
+        self.handlers.add(task)
+        try:
+            await handler(reader, writer)
+        except asyncio.CancelledError:
+            writer.close()
+        finally:
+            self.handlers.discard(task)
+
+    async def run(self, source):
+        """
+        :param source: Object with run() and stop(), e.g. SerialIngest or
+                       ReplaySource, started in a background thread
+        """
+        self.loop = asyncio.get_running_loop()
+        tcp = await asyncio.start_server(lambda r, w: self._handle(self.handle_tcp, r, w),
+                                         self.host, self.tcp_port)
+        ws = await asyncio.start_server(lambda r, w: self._handle(self.handle_ws, r, w),
+                                        self.host, self.ws_port)
+        print(f"Telemetry on tcp://{self.host}:{self.tcp_port} and ws://{self.host}:{self.ws_port}")
+
+        reader = threading.Thread(target=source.run, daemon=True)
+        reader.start()
+        try:
+            while reader.is_alive():
+                await asyncio.sleep(1)
+        finally:
+            source.stop()
+            tcp.close()
+            ws.close()
+            handlers = list(self.handlers)
+            for task in handlers:
+                task.cancel()
+            await asyncio.gather(*handlers, return_exceptions=True)
+            await tcp.wait_closed()
+            await ws.wait_closed()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless pneumo stand telemetry fan-out")
+    parser.add_argument('--port', default='COM6', help="Serial port of the stand controller")
+    parser.add_argument('--baudrate', type=int, default=115200)
+    parser.add_argument('--replay', help="Serve a recorded session instead of the serial port")
+    parser.add_argument('--speed', type=float, default=1.0, help="Replay speed factor, 0 = as fast as possible")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--tcp-port', type=int, default=8765)
+    parser.add_argument('--ws-port', type=int, default=8766)
+    parser.add_argument('--sensors', default=DEFAULT_CONFIG, help="Sensor registry config")
+    parser.add_argument('--json-only', action='store_true', help="Do not offer binary telemetry framing")
+    args = parser.parse_args()
+
+    server = TelemetryServer(SensorRegistry.load(args.sensors), args.host, args.tcp_port, args.ws_port)
+    if args.replay:
+        ingest = SerialIngest(None, server.on_batch)
+        source = ReplaySource(args.replay, ingest.feed, speed=args.speed)
+    else:
+        try:
+            ser = serial.Serial(args.port, args.baudrate)
+        except serial.SerialException as e:
+            print(f"Error: {e}")
+            return
+        source = SerialIngest(ser, server.on_batch)
+        if not args.json_only:
+            source.request_binary()
+
+    try:
+        asyncio.run(server.run(source))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
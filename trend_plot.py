@@ -0,0 +1,158 @@
+import threading
+
+import numpy as np
+
+
+class RingBuffer:
+    """
+    Fixed-size history of (time, value) samples backed by NumPy arrays.
+
+    Once full, the oldest samples are overwritten, so memory use is set at
+    construction. Appends and window reads are guarded by a lock because
+    samples are written from the serial thread and read from the Tk loop.
+    Plots read MinMaxColumns from add_columns instead of the samples, so
+    their cost does not grow with the history.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.times = np.empty(capacity, dtype=np.float64)
+        self.values = np.empty(capacity, dtype=np.float32)
+        self.head = 0  # Index of the next write
+        self.count = 0
+        self.lock = threading.Lock()
+        self.columns = []  # MinMaxColumns fed by append
+
+    def __len__(self):
+        return self.count
+
+    def append(self, t, value):
+        with self.lock:
+            self.times[self.head] = t
+            self.values[self.head] = value
+            self.head = (self.head + 1) % self.capacity
+            if self.count < self.capacity:
+                self.count += 1
+            for columns in self.columns:
+                columns.add(t, value)
+
+    def add_columns(self, width, span):
+        """MinMaxColumns over the last span seconds, fed from now on"""
+        columns = MinMaxColumns(width, span, self.lock)
+        with self.lock:
+            self.columns.append(columns)
+        return columns
+
+    def window(self, t_start):
+        """Samples with time >= t_start in chronological order (copies)"""
+        with self.lock:
+            if self.count < self.capacity:
+                segments = ((self.times[:self.count], self.values[:self.count]),)
+            else:
+                segments = ((self.times[self.head:], self.values[self.head:]),
+                            (self.times[:self.head], self.values[:self.head]))
+            times = []
+            values = []
+            for seg_t, seg_v in segments:
+                first = np.searchsorted(seg_t, t_start)
+                times.append(seg_t[first:])
+                values.append(seg_v[first:])
+            return np.concatenate(times), np.concatenate(values)
+
+
+class MinMaxColumns:
+    """
+    Running min and max per pixel column of a scrolling plot.
+
+    Columns are span / width seconds wide and aligned to absolute time, so
+    a sample only touches the column it falls in and a column is reused
+    once it scrolls out. A snapshot copies width entries whatever the
+    sample rate.
+    """
+
+    def __init__(self, width, span, lock):
+        self.width = width
+        self.step = span / width
+        self.lock = lock  # Shared with the RingBuffer that calls add
+        self.ids = np.full(width, -1, dtype=np.int64)  # Absolute column held by each slot
+        self.mins = np.empty(width, dtype=np.float32)
+        self.maxs = np.empty(width, dtype=np.float32)
+
+    def add(self, t, value):
+        """Fold in one sample, the caller holds the lock"""
+        column = int(t // self.step)
+        slot = column % self.width
+        if self.ids[slot] != column:
+            self.ids[slot] = column
+            self.mins[slot] = value
+            self.maxs[slot] = value
+        elif value < self.mins[slot]:
+            self.mins[slot] = value
+        elif value > self.maxs[slot]:
+            self.maxs[slot] = value
+
+    def snapshot(self, now):
+        """
+        Columns of the span ending at now.
+
+        :return: (columns, mins, maxs) for the columns that hold any samples,
+                 column 0 being the oldest
+        """
+        with self.lock:
+            ids = self.ids.copy()
+            mins = self.mins.copy()
+            maxs = self.maxs.copy()
+        wanted = int(now // self.step) - self.width + 1 + np.arange(self.width)
+        slots = wanted % self.width
+        columns = np.nonzero(ids[slots] == wanted)[0]
+        slots = slots[columns]
+        return columns, mins[slots], maxs[slots]
+
+
+class TrendPlot:
+    """Scrolling min/max trend of one RingBuffer drawn on a Tk canvas"""
+
+    def __init__(self, canvas, buffer, x, y, width, height, label, color='blue', span=600.0):
+        """
+        :param canvas: Tk canvas to draw on
+        :param buffer: RingBuffer with the sensor history, samples appended from now on are plotted
+        :param x, y: Top-left corner of the plot area
+        :param width, height: Plot size in pixels, one min/max pair per column
+        :param label: Caption shown in the corner
+        :param color: Trace colour
+        :param span: Visible time span in seconds
+        """
+        self.canvas = canvas
+        self.buffer = buffer
+        self.x = x
+        self.y = y
+        self.width = width
+        self.height = height
+        self.span = span
+        self.label = label
+        self.columns = buffer.add_columns(width, span)
+
+        canvas.create_rectangle(x, y, x + width, y + height, outline='gray')
+        self.trace = canvas.create_line(x, y + height, x, y + height, fill=color)
+        self.caption = canvas.create_text(x + 4, y + 2, anchor='nw', text=label, fill='black')
+
+    def redraw(self, now):
+        columns, mins, maxs = self.columns.snapshot(now)
+        if len(columns) < 2:
+            return
+
+        low = float(mins.min())
+        high = float(maxs.max())
+        scale = (self.height - 4) / (high - low) if high > low else 0.0
+        bottom = self.y + self.height - 2
+
+        # One polyline zig-zagging through min and max of every column
+        xs = np.repeat(self.x + columns, 2)
+        ys = np.empty(2 * len(columns))
+        ys[0::2] = bottom - (mins - low) * scale
+        ys[1::2] = bottom - (maxs - low) * scale
+        points = np.empty(4 * len(columns))
+        points[0::2] = xs
+        points[1::2] = ys
+        self.canvas.coords(self.trace, *points.tolist())
+        self.canvas.itemconfig(self.caption, text=f"{self.label}  {low:.2f} .. {high:.2f}")